@@ -0,0 +1,210 @@
+import random
+from dataclasses import dataclass
+
+from src.grammar_utils import Grammar
+from src.util import is_nonterminal
+
+START_SYMBOL = "<start>"
+END_MARKER = "#"
+SHARED_TERMINALS = [f"A{index}" for index in range(8)]
+
+
+@dataclass
+class GrammarSpec:
+    nonterminals: int = 20
+    alternatives: int = 3
+    body_length: int = 4
+    direct_recursion: float = 0.0
+    indirect_recursion: float = 0.0
+    shared_prefix: float = 0.0
+    epsilon: float = 0.0
+    seed: int = 0
+
+
+class TerminalFactory:
+    def __init__(self) -> None:
+        self.counts: dict[str, int] = {}
+
+    def fresh(self, prefix: str) -> str:
+        count = self.counts.get(prefix, 0)
+        self.counts[prefix] = count + 1
+        return f"{prefix}{count}"
+
+
+def generate_grammar(spec: GrammarSpec) -> tuple[Grammar, str]:
+    rng = random.Random(spec.seed)
+    terminals = TerminalFactory()
+    names = [f"<n{index}>" for index in range(spec.nonterminals)]
+    roles = assign_roles(spec, rng)
+    bodies: list[list[list[str]]] = [[] for _ in names]
+
+    for index, role in enumerate(roles):
+        if role[0] == "indirect_head":
+            bodies[index].append([names[role[1]]])
+            continue
+        for alternative in range(spec.alternatives):
+            if alternative and bodies[index] and rng.random() < spec.shared_prefix:
+                source = rng.choice(bodies[index])
+                prefix = source[:rng.randint(1, len(source))]
+                bodies[index].append(prefix + [terminals.fresh("D")] + random_tail(index, alternative, spec, rng,
+                                                                                     names, terminals, 1))
+            else:
+                bodies[index].append([terminals.fresh("T")] + random_tail(index, alternative, spec, rng, names,
+                                                                          terminals, spec.body_length - 1))
+        if role[0] == "direct":
+            bodies[index].append([names[index], terminals.fresh("L")] + rng.sample(SHARED_TERMINALS, 1))
+        elif role[0] == "indirect_tail":
+            bodies[index].append([names[role[1]], terminals.fresh("L")])
+        elif role[0] == "epsilon":
+            bodies[index].append(["ε"])
+
+    connect_unreachable(bodies, roles, names, terminals, rng)
+
+    language = Grammar(dict())
+    language.add_production(START_SYMBOL, [names[0], END_MARKER], [])
+    for index, name in enumerate(names):
+        for body in bodies[index]:
+            language.add_production(name, body, [])
+    return language, START_SYMBOL
+
+
+def assign_roles(spec: GrammarSpec, rng: random.Random) -> list[tuple[str, int]]:
+    roles = [("plain", -1)] * spec.nonterminals
+    for index in range(1, spec.nonterminals - 1):
+        if roles[index][0] != "plain" or rng.random() >= spec.indirect_recursion:
+            continue
+        partner = rng.randrange(index + 1, spec.nonterminals)
+        if roles[partner][0] == "plain":
+            roles[index] = ("indirect_head", partner)
+            roles[partner] = ("indirect_tail", index)
+
+    for index in range(spec.nonterminals):
+        if roles[index][0] != "plain":
+            continue
+        if rng.random() < spec.direct_recursion:
+            roles[index] = ("direct", -1)
+        elif rng.random() < spec.epsilon:
+            roles[index] = ("epsilon", -1)
+    return roles
+
+
+def random_tail(index: int, alternative: int, spec: GrammarSpec, rng: random.Random, names: list[str],
+                terminals: TerminalFactory, length: int) -> list[str]:
+    tail = []
+    for _ in range(length):
+        if rng.random() < 0.5:
+            tail.append(rng.choice(SHARED_TERMINALS))
+            continue
+        if alternative == 0:
+            if index + 1 >= len(names):
+                tail.append(rng.choice(SHARED_TERMINALS))
+                continue
+            target = rng.randrange(index + 1, len(names))
+        else:
+            target = rng.randrange(len(names))
+        tail.extend([names[target], terminals.fresh("C")])
+    return tail
+
+
+def connect_unreachable(bodies: list[list[list[str]]], roles: list[tuple[str, int]], names: list[str],
+                        terminals: TerminalFactory, rng: random.Random) -> None:
+    positions = {name: index for index, name in enumerate(names)}
+    reachable = set()
+
+    def mark_reachable(index: int) -> None:
+        pending = [index]
+        while pending:
+            current = pending.pop()
+            if current in reachable:
+                continue
+            reachable.add(current)
+            pending.extend(positions[symbol] for body in bodies[current] for symbol in body if symbol in positions)
+
+    mark_reachable(0)
+    for index in range(1, len(names)):
+        if index in reachable:
+            continue
+        hosts = [host for host in range(index) if host in reachable and roles[host][0] != "indirect_head"]
+        if not hosts:
+            continue
+        bodies[rng.choice(hosts)][0].extend([names[index], terminals.fresh("C")])
+        mark_reachable(index)
+
+
+def minimal_lengths(language: Grammar) -> dict[str, int]:
+    lengths = {nonterminal: None for nonterminal in language.rules}
+    changed = True
+    while changed:
+        changed = False
+        for nonterminal, rule_obj in language.rules.items():
+            for prod in rule_obj.productions:
+                length = sequence_length(prod.symbols, lengths)
+                if length is not None and (lengths[nonterminal] is None or length < lengths[nonterminal]):
+                    lengths[nonterminal] = length
+                    changed = True
+    return lengths
+
+
+def sequence_length(symbol_list: list[str], lengths: dict[str, int | None]) -> int | None:
+    total = 0
+    for symbol in symbol_list:
+        if symbol == "ε":
+            continue
+        if is_nonterminal(symbol):
+            if lengths.get(symbol) is None:
+                return None
+            total += lengths[symbol]
+        else:
+            total += 1
+    return total
+
+
+def generate_input(language: Grammar, start_symbol: str, target_tokens: int, rng: random.Random,
+                   lengths: dict[str, int] | None = None) -> list[str]:
+    lengths = lengths or minimal_lengths(language)
+    output = []
+    pending = [start_symbol]
+    pending_cost = lengths[start_symbol]
+
+    while pending:
+        symbol = pending.pop()
+        if symbol == "ε":
+            continue
+        if not is_nonterminal(symbol):
+            output.append(symbol)
+            pending_cost -= 1
+            continue
+
+        productions = language.rules[symbol].productions
+        pending_cost -= lengths[symbol]
+        if len(output) + pending_cost < target_tokens:
+            prod = max(productions, key=lambda item: rng.random() * (1 + sum(map(is_nonterminal, item.symbols))))
+        else:
+            prod = min(productions, key=lambda item: (sequence_length(item.symbols, lengths), rng.random()))
+        pending_cost += sequence_length(prod.symbols, lengths)
+        pending.extend(reversed(prod.symbols))
+
+    return output
+
+
+def mutate_input(input_sequence: list[str], vocabulary: list[str], rng: random.Random) -> list[str]:
+    mutated = list(input_sequence)
+    position = rng.randrange(len(mutated))
+    operation = rng.randrange(3)
+    if operation == 0 and len(mutated) > 1:
+        del mutated[position]
+    elif operation == 1:
+        mutated.insert(position, rng.choice(vocabulary))
+    else:
+        mutated[position] = rng.choice(vocabulary)
+    return mutated
+
+
+def grammar_vocabulary(language: Grammar) -> list[str]:
+    return sorted({symbol for rule_obj in language.rules.values() for prod in rule_obj.productions
+                   for symbol in prod.symbols if symbol != "ε" and not is_nonterminal(symbol)})
+
+
+def format_grammar(language: Grammar) -> list[str]:
+    return [f"{nonterminal} -> {' '.join(prod.symbols)}\n"
+            for nonterminal, rule_obj in language.rules.items() for prod in rule_obj.productions]
@@ -0,0 +1,69 @@
+import json
+import sys
+import time
+from collections import Counter
+
+from lab6.lexer import Lexer
+from lab6.main import process_tokens
+from src.build_parsing_table import create_analysis_table
+from src.check_line import validate_input_sequence
+from src.grammar_utils import parse_grammar_with_first_sets
+from src.parser_stats import record_corpus
+
+
+def read_token_types(input_file: str) -> list[str]:
+    lexer = Lexer(input_file)
+    tokens = process_tokens(lexer)
+    lexer.close()
+    return [token.type for token in tokens]
+
+
+def measure(corpus: list[list[str]], analysis_table: list, repeat: int) -> dict:
+    row_hits = Counter()
+    for input_sequence in corpus:
+        validate_input_sequence(input_sequence, analysis_table, row_hits)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for input_sequence in corpus:
+            validate_input_sequence(input_sequence, analysis_table)
+    elapsed = time.perf_counter() - started
+
+    return {"steps": sum(row_hits.values()), "seconds": elapsed}
+
+
+def main() -> None:
+    if len(sys.argv) < 3:
+        print("Usage: python -m benchmarks.hot_alternatives <grammar-with-first-sets> <input-file>... [--repeat N]")
+        return
+
+    arguments = sys.argv[1:]
+    repeat = 50
+    if "--repeat" in arguments:
+        position = arguments.index("--repeat")
+        repeat = int(arguments[position + 1])
+        del arguments[position:position + 2]
+
+    with open(arguments[0], "r", encoding="utf-8") as f:
+        language = parse_grammar_with_first_sets(f.readlines())
+    start_symbol = next(iter(language.rules))
+    corpus = [read_token_types(input_file) for input_file in arguments[1:]]
+
+    statistics = record_corpus(corpus, language, start_symbol)
+    baseline = measure(corpus, create_analysis_table(language, start_symbol), repeat)
+    ordered = measure(corpus, create_analysis_table(language, start_symbol, statistics.alternative_counts), repeat)
+
+    print(json.dumps({
+        "benchmark": "hot_alternatives",
+        "inputs": len(corpus),
+        "tokens": sum(len(input_sequence) for input_sequence in corpus),
+        "repeat": repeat,
+        "grammar_order": baseline,
+        "frequency_order": ordered,
+        "step_reduction": 1 - ordered["steps"] / baseline["steps"] if baseline["steps"] else 0.0,
+        "speedup": baseline["seconds"] / ordered["seconds"] if ordered["seconds"] else 0.0,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
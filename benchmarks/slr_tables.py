@@ -0,0 +1,137 @@
+import argparse
+import json
+import os
+import pickle
+import random
+import tempfile
+import time
+
+from slr_parser.grammar import Grammar
+from slr_parser.slr_parser import SLRParser
+
+
+def generate_assignment_grammar(levels: int) -> str:
+    lines = ["S -> S ; A | A", "A -> L = E0 | E0"]
+    for level in range(levels):
+        lines.append(f"E{level} -> E{level} o{level} E{level + 1} | E{level + 1}")
+    lines.append(f"E{levels} -> L | ( E0 )")
+    lines.append(f"L -> * E{levels} | id | id [ E0 ]")
+    return "\n".join(lines)
+
+
+def generate_assignment_input(levels: int, statements: int, rng: random.Random) -> str:
+    tokens = []
+    for _ in range(statements):
+        if tokens:
+            tokens.append(";")
+        if rng.random() < 0.5:
+            tokens.extend(["id", "="])
+        for operand in range(rng.randint(1, 4)):
+            if operand:
+                tokens.append(f"o{rng.randrange(levels)}")
+            tokens.extend(rng.choice([["id"], ["*", "id"], ["id", "[", "id", "]"], ["(", "id", ")"]]))
+    return " ".join(tokens)
+
+
+def count_conflicts(parsing_table: dict) -> int:
+    return sum(isinstance(action, str) and "/" in action for row in parsing_table.values() for action in row.values())
+
+
+def measure_mode(G: Grammar, mode: str, repeat: int) -> dict:
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        slr_parser = SLRParser(G, mode)
+        seconds.append(time.perf_counter() - started)
+    return {"states": len(slr_parser.C), "conflicts": count_conflicts(slr_parser.parsing_table),
+            "build_seconds": min(seconds)}
+
+
+def measure_parse(slr_parser: SLRParser, inputs: list[str], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for w in inputs:
+            slr_parser.parse(w)
+    return time.perf_counter() - started
+
+
+def measure_compression(G: Grammar, mode: str, inputs: list[str], repeat: int) -> dict:
+    dense = SLRParser(G, mode)
+    compressed = SLRParser(G, mode, compressed=True)
+    with tempfile.TemporaryDirectory() as directory:
+        dense.write_table(os.path.join(directory, "slr_table.csv"))
+        compressed.compressed.to_csv(os.path.join(directory, "slr_table_packed.csv"))
+        dense_file = os.path.getsize(os.path.join(directory, "slr_table.csv"))
+        packed_file = os.path.getsize(os.path.join(directory, "slr_table_packed.csv"))
+
+    result = {"dense_table_bytes": len(pickle.dumps(dense.parsing_table)) + len(pickle.dumps(dense.action_rows)),
+              "packed_table_bytes": compressed.compressed.nbytes(), "dense_file_bytes": dense_file,
+              "packed_file_bytes": packed_file}
+    if inputs:
+        dense_seconds = measure_parse(dense, inputs, repeat)
+        packed_seconds = measure_parse(compressed, inputs, repeat)
+        result.update({"dense_parse_seconds": dense_seconds, "packed_parse_seconds": packed_seconds,
+                       "lookup_overhead": packed_seconds / dense_seconds - 1 if dense_seconds else 0.0})
+    return result
+
+
+def measure_unit_elimination(G: Grammar, mode: str, inputs: list[str], traced_input: str, repeat: int) -> dict:
+    plain = SLRParser(G, mode)
+    bypassed = SLRParser(G, mode, unit_elimination=True)
+    result = {"states": len(plain.parsing_table), "states_with_bypass": len(bypassed.parsing_table)}
+    if traced_input:
+        result["steps"] = len(plain.LR_parser(traced_input)["step"]) - 1
+        result["steps_with_bypass"] = len(bypassed.LR_parser(traced_input)["step"]) - 1
+    if inputs:
+        result["parse_seconds"] = measure_parse(plain, inputs, repeat)
+        result["parse_seconds_with_bypass"] = measure_parse(bypassed, inputs, repeat)
+    return result
+
+
+def benchmark_grammar(name: str, grammar_str: str, repeat: int, inputs: list[str] | None = None,
+                      traced_input: str = "") -> dict:
+    G = Grammar(grammar_str)
+    slr = measure_mode(G, "slr", repeat)
+    lalr = measure_mode(G, "lalr", repeat)
+    mode = "lalr" if lalr["conflicts"] < slr["conflicts"] else "slr"
+    return {"grammar": name, "productions": sum(len(bodies) for bodies in G.grammar.values()), "slr": slr,
+            "lalr": lalr, "lalr_overhead": lalr["build_seconds"] / slr["build_seconds"] - 1
+            if slr["build_seconds"] else 0.0, "compression": measure_compression(G, mode, inputs or [], repeat),
+            "unit_elimination": measure_unit_elimination(G, mode, inputs or [], traced_input, repeat)}
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="SLR(1) versus LALR(1) table construction benchmark.")
+    parser.add_argument("grammar_files", nargs="*", help="grammar files in slr_parser syntax")
+    parser.add_argument("--levels", default="5,20,80", help="comma separated precedence levels of the "
+                                                           "synthetic assignment grammar")
+    parser.add_argument("--statements", type=int, default=2000,
+                        help="statements per parsed input of the synthetic grammar")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    return parser.parse_args()
+
+
+def main() -> None:
+    arguments = parse_arguments()
+    results = []
+    for grammar_file in arguments.grammar_files:
+        with open(grammar_file, "r", encoding="utf-8") as f:
+            results.append(benchmark_grammar(grammar_file, f.read(), arguments.repeat))
+    for levels in (int(value) for value in arguments.levels.split(",") if value):
+        rng = random.Random(levels)
+        inputs = [generate_assignment_input(levels, arguments.statements, rng) for _ in range(3)]
+        traced_input = generate_assignment_input(levels, 100, rng)
+        results.append(benchmark_grammar(f"assignment-{levels}", generate_assignment_grammar(levels),
+                                         arguments.repeat, inputs, traced_input))
+
+    report = json.dumps({"benchmark": "slr_tables", "results": results}, indent=2)
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
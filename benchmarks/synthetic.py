@@ -0,0 +1,156 @@
+import argparse
+import json
+import random
+import tempfile
+import time
+
+from benchmarks.generators import GrammarSpec, generate_grammar, generate_input, mutate_input, minimal_lengths, \
+    grammar_vocabulary
+from src.build_parsing_table import create_analysis_table
+from src.check_line import validate_input_sequence
+from src.grammar import simplify_grammar, eliminate_indirect_recursion, eliminate_direct_recursion, \
+    remove_unused_rules, compute_directing_sets
+from src.grammar_utils import compact_grammar
+from src.grammar_validation import validate_language, verify_ll1_compatibility
+from src.profiling import PipelineProfiler
+from src.recognizer import load_recognizer
+
+
+def run_pipeline(spec: GrammarSpec, profiler: PipelineProfiler) -> tuple[list, str | None]:
+    with profiler.stage("generate_grammar") as metrics:
+        text_language, start_symbol = generate_grammar(spec)
+        language = compact_grammar(text_language)
+    profiler.add_grammar_metrics(metrics, language)
+
+    with profiler.stage("validate_grammar") as metrics:
+        validation_result = validate_language(language, start_symbol)
+    profiler.add_grammar_metrics(metrics, language)
+    if validation_result:
+        return [], validation_result
+
+    with profiler.stage("simplify_grammar") as metrics:
+        language = simplify_grammar(language)
+    profiler.add_grammar_metrics(metrics, language)
+
+    with profiler.stage("eliminate_indirect_recursion") as metrics:
+        language = eliminate_indirect_recursion(language)
+    profiler.add_grammar_metrics(metrics, language)
+
+    with profiler.stage("eliminate_direct_recursion") as metrics:
+        language = eliminate_direct_recursion(language)
+    profiler.add_grammar_metrics(metrics, language)
+
+    with profiler.stage("remove_unused_rules") as metrics:
+        language = remove_unused_rules(language, start_symbol)
+    profiler.add_grammar_metrics(metrics, language)
+
+    with profiler.stage("compute_directing_sets") as metrics:
+        language = compute_directing_sets(language, start_symbol)
+    profiler.add_grammar_metrics(metrics, language)
+
+    with profiler.stage("verify_ll1") as metrics:
+        ll1_issue = verify_ll1_compatibility(language)
+    profiler.add_grammar_metrics(metrics, language)
+    if ll1_issue:
+        return [], ll1_issue
+
+    with profiler.stage("build_table") as metrics:
+        analysis_table = create_analysis_table(language, start_symbol)
+        metrics["rows"] = len(analysis_table)
+
+    return analysis_table, None
+
+
+def generate_corpus(spec: GrammarSpec, inputs: int, tokens: int) -> tuple[list[list[str]], list[list[str]]]:
+    language, start_symbol = generate_grammar(spec)
+    rng = random.Random(spec.seed)
+    lengths = minimal_lengths(language)
+    vocabulary = grammar_vocabulary(language)
+    valid = [generate_input(language, start_symbol, tokens, rng, lengths) for _ in range(inputs)]
+    invalid = [mutate_input(input_sequence, vocabulary, rng) for input_sequence in valid]
+    return valid, invalid
+
+
+def measure_throughput(validate, corpus: list[list[str]], repeat: int) -> dict:
+    token_count = sum(len(input_sequence) for input_sequence in corpus) * repeat
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for input_sequence in corpus:
+            validate(input_sequence)
+    elapsed = time.perf_counter() - started
+    return {"seconds": elapsed, "tokens": token_count, "tokens_per_second": token_count / elapsed if elapsed else 0.0}
+
+
+def benchmark_spec(spec: GrammarSpec, inputs: int, tokens: int, repeat: int) -> dict:
+    timing = PipelineProfiler(trace_memory=False)
+    analysis_table, issue = run_pipeline(spec, timing)
+    memory = PipelineProfiler()
+    run_pipeline(spec, memory)
+    memory.stop()
+
+    stages = timing.to_dict()["stages"]
+    for stage, traced in zip(stages, memory.to_dict()["stages"]):
+        stage["peak_bytes"] = traced["peak_bytes"]
+        stage["allocated_bytes"] = traced["allocated_bytes"]
+
+    result = {"spec": vars(spec), "stages": stages, "issue": issue}
+    if issue:
+        return result
+
+    valid, invalid = generate_corpus(spec, inputs, tokens)
+    result["inputs"] = {
+        "valid": len(valid),
+        "invalid": len(invalid),
+        "tokens": sum(len(input_sequence) for input_sequence in valid),
+        "accepted": sum(validate_input_sequence(input_sequence, analysis_table) == "Ok" for input_sequence in valid),
+        "rejected": sum(validate_input_sequence(input_sequence, analysis_table) != "Ok" for input_sequence in invalid),
+    }
+
+    corpus = valid + invalid
+    result["interpreter"] = measure_throughput(lambda input_sequence: validate_input_sequence(
+        input_sequence, analysis_table), corpus, repeat)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        started = time.perf_counter()
+        recognizer = load_recognizer(analysis_table, cache_dir)
+        result["recognizer_compile_seconds"] = time.perf_counter() - started
+        result["recognizer"] = measure_throughput(recognizer, corpus, repeat)
+    return result
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Synthetic grammar benchmarks for the LL(1) toolchain.")
+    parser.add_argument("--sizes", default="10,50,200", help="comma separated nonterminal counts")
+    parser.add_argument("--alternatives", type=int, default=3)
+    parser.add_argument("--body-length", type=int, default=4)
+    parser.add_argument("--direct-recursion", type=float, default=0.2)
+    parser.add_argument("--indirect-recursion", type=float, default=0.1)
+    parser.add_argument("--shared-prefix", type=float, default=0.3)
+    parser.add_argument("--epsilon", type=float, default=0.2)
+    parser.add_argument("--inputs", type=int, default=20)
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    return parser.parse_args()
+
+
+def main() -> None:
+    arguments = parse_arguments()
+    results = []
+    for size in (int(value) for value in arguments.sizes.split(",")):
+        spec = GrammarSpec(nonterminals=size, alternatives=arguments.alternatives,
+                           body_length=arguments.body_length, direct_recursion=arguments.direct_recursion,
+                           indirect_recursion=arguments.indirect_recursion, shared_prefix=arguments.shared_prefix,
+                           epsilon=arguments.epsilon, seed=arguments.seed)
+        results.append(benchmark_spec(spec, arguments.inputs, arguments.tokens, arguments.repeat))
+
+    report = json.dumps({"benchmark": "synthetic", "results": results}, indent=2)
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
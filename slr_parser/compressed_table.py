@@ -0,0 +1,150 @@
+import csv
+from array import array
+from collections import Counter
+
+EMPTY = -1
+
+
+def pack_rows(rows, width):
+    # Row displacement: each row's entries go to base + column of a shared comb vector, with check = row owner.
+    base = array('i', [0] * len(rows))
+    check = array('i')
+    value = array('i')
+    first_free = 0
+
+    for r in sorted(range(len(rows)), key=lambda r: -len(rows[r])):
+        columns = sorted(rows[r])
+        if not columns:
+            continue
+        b = max(0, first_free - columns[0])
+        while any(b + c < len(check) and check[b + c] != EMPTY for c in columns):
+            b += 1
+
+        end = b + columns[-1] + 1
+        if end > len(check):
+            check.extend([EMPTY] * (end - len(check)))
+            value.extend([EMPTY] * (end - len(value)))
+        for c in columns:
+            check[b + c] = r
+            value[b + c] = rows[r][c]
+        base[r] = b
+        while first_free < len(check) and check[first_free] != EMPTY:
+            first_free += 1
+
+    # Padding by one row width lets lookups index base + column without a bounds check.
+    check.extend([EMPTY] * width)
+    value.extend([EMPTY] * width)
+    return base, check, value
+
+
+def cyclic_unit_productions(productions, nonterminals):
+    # Indices of unit productions A -> B with B =>+ A through unit productions alone.
+    units = {}
+    for i, production in enumerate(productions):
+        body = production['body']
+        if i and len(body) == 1 and body[0] in nonterminals:
+            units.setdefault(production['head'], set()).add(body[0])
+
+    cyclic = set()
+    for i, production in enumerate(productions):
+        body = production['body']
+        if not i or len(body) != 1 or body[0] not in nonterminals:
+            continue
+        reached, pending = set(), [body[0]]
+        while pending:
+            X = pending.pop()
+            if X not in reached:
+                reached.add(X)
+                pending.extend(units.get(X, ()))
+        if production['head'] in reached:
+            cyclic.add(i)
+    return cyclic
+
+
+class CompressedTable:
+    def __init__(self, terminals, nonterminals, default_action, action_base, action_check, action_value,
+                 default_goto, goto_base, goto_check, goto_value, conflicts):
+        self.terminals = terminals
+        self.nonterminals = nonterminals
+        self.terminal_ids = {symbol: j for j, symbol in enumerate(terminals)}
+        self.nonterminal_ids = {symbol: j for j, symbol in enumerate(nonterminals)}
+        self.default_action = default_action
+        self.action_base = action_base
+        self.action_check = action_check
+        self.action_value = action_value
+        self.default_goto = default_goto
+        self.goto_base = goto_base
+        self.goto_check = goto_check
+        self.goto_value = goto_value
+        self.conflicts = conflicts
+
+    @classmethod
+    def build(cls, slr_parser):
+        terminals = list(slr_parser.action_symbols)
+        nonterminals = sorted(slr_parser.G_prime.nonterminals - {slr_parser.G_prime.start})
+        terminal_ids = {symbol: j for j, symbol in enumerate(terminals)}
+        conflicts = {}
+        cyclic = cyclic_unit_productions(slr_parser.G_indexed, slr_parser.G_prime.nonterminals)
+
+        default_action = array('i')
+        action_rows = []
+        for state, encoded in enumerate(slr_parser.action_rows):
+            conflicted = False
+            for symbol, action in slr_parser.parsing_table[state].items():
+                if isinstance(action, str) and '/' in action:
+                    conflicts[(state, symbol)] = action
+                    conflicted = True
+            # The most frequent reduction of a state becomes its default and covers the empty cells too.
+            # A default would hide the error on a conflicting row, and one by A -> B on a unit cycle
+            # (B =>+ A) can reduce forever on input the dense table rejects, so those rows keep none.
+            reductions = Counter(code for code in encoded.values() if slr_parser.decode_action(code).startswith('r'))
+            if conflicted or any(int(slr_parser.decode_action(code)[1:]) in cyclic for code in reductions):
+                reductions.clear()
+            default = reductions.most_common(1)[0][0] if reductions else EMPTY
+            default_action.append(default)
+            action_rows.append({terminal_ids[symbol]: code for symbol, code in encoded.items() if code != default})
+
+        default_goto = array('i')
+        goto_rows = []
+        for X in nonterminals:
+            column = {state: row[X] for state, row in slr_parser.parsing_table.items() if X in row}
+            targets = Counter(column.values())
+            default = targets.most_common(1)[0][0] if targets else EMPTY
+            default_goto.append(default)
+            goto_rows.append({state: target for state, target in column.items() if target != default})
+
+        return cls(terminals, nonterminals, default_action, *pack_rows(action_rows, len(terminals)),
+                   default_goto, *pack_rows(goto_rows, len(slr_parser.parsing_table)), conflicts)
+
+    def action(self, state, terminal_id):
+        index = self.action_base[state] + terminal_id
+        if self.action_check[index] == state:
+            return self.action_value[index]
+        return self.default_action[state]
+
+    def goto(self, state, nonterminal_id):
+        index = self.goto_base[nonterminal_id] + state
+        if self.goto_check[index] == nonterminal_id:
+            return self.goto_value[index]
+        return self.default_goto[nonterminal_id]
+
+    def nbytes(self):
+        vectors = (self.default_action, self.action_base, self.action_check, self.action_value,
+                   self.default_goto, self.goto_base, self.goto_check, self.goto_value)
+        return sum(len(vector) * vector.itemsize for vector in vectors)
+
+    def to_csv(self, path):
+        with open(path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['TERMINALS'] + self.terminals)
+            writer.writerow(['NONTERMINALS'] + self.nonterminals)
+            writer.writerow(['DEFAULT_ACTION'] + self.default_action.tolist())
+            writer.writerow(['ACTION_BASE'] + self.action_base.tolist())
+            writer.writerow(['ACTION_CHECK'] + self.action_check.tolist())
+            writer.writerow(['ACTION_VALUE'] + self.action_value.tolist())
+            writer.writerow(['DEFAULT_GOTO'] + self.default_goto.tolist())
+            writer.writerow(['GOTO_BASE'] + self.goto_base.tolist())
+            writer.writerow(['GOTO_CHECK'] + self.goto_check.tolist())
+            writer.writerow(['GOTO_VALUE'] + self.goto_value.tolist())
+            for (state, symbol), action in sorted(self.conflicts.items()):
+                writer.writerow(['CONFLICT', state, symbol, action])
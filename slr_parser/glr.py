@@ -0,0 +1,167 @@
+from collections import deque
+
+
+class GSSNode:
+    __slots__ = ('state', 'level', 'edges')
+
+    def __init__(self, state, level):
+        self.state = state
+        self.level = level
+        # predecessor node -> SPPF node of the symbol on that edge (None without a forest)
+        self.edges = {}
+
+
+class SPPFNode:
+    __slots__ = ('symbol', 'start', 'end', 'families')
+
+    def __init__(self, symbol, start, end):
+        self.symbol = symbol
+        self.start = start
+        self.end = end
+        # each family is one packed alternative: the tuple of child nodes of a production
+        self.families = set()
+
+    def count_trees(self, memo=None):
+        memo = {} if memo is None else memo
+        if self in memo:
+            # A node that is still being counted lies on a cycle (A -> A): infinitely many trees.
+            return float('inf') if memo[self] is None else memo[self]
+        if not self.families:
+            return 1
+        memo[self] = None
+        total = 0
+        for family in self.families:
+            count = 1
+            for child in family:
+                count *= child.count_trees(memo)
+            total += count
+        memo[self] = total
+        return total
+
+    def __repr__(self):
+        return f'SPPFNode({self.symbol!r}, {self.start}, {self.end})'
+
+
+class GLRParser:
+    def __init__(self, slr_parser):
+        self.slr_parser = slr_parser
+        self.productions = [(production['head'], 0 if production['body'] == ['^'] else len(production['body']))
+                            for production in slr_parser.G_indexed]
+        self.actions = {}
+
+    def cell_actions(self, state, a):
+        key = (state, a)
+        if key not in self.actions:
+            cell = self.slr_parser.action_cell(state, a)
+            self.actions[key] = cell.split('/') if cell else []
+        return self.actions[key]
+
+    def reductions(self, state, a):
+        return [int(action[1:]) for action in self.cell_actions(state, a) if action.startswith('r')]
+
+    def recognize(self, w):
+        return self.run(w, False)[0]
+
+    def parse_forest(self, w):
+        return self.run(w, True)
+
+    def run(self, w, build_forest):
+        buffer = w.split()
+        buffer.append('$')
+        frontier = {0: GSSNode(0, 0)}
+
+        for i, a in enumerate(buffer):
+            if a not in self.slr_parser.action_symbols:
+                return f'ERROR: unrecognized symbol {a}', None
+
+            forest = {}
+            self.reduce_all(frontier, i, a, forest if build_forest else None)
+
+            if a == '$':
+                for node in frontier.values():
+                    if 'acc' in self.cell_actions(node.state, a):
+                        root = next(label for u, label in node.edges.items() if u.level == 0 and u.state == 0)
+                        return 'accept', root
+                return 'ERROR: input cannot be parsed by given grammar', None
+
+            leaf = SPPFNode(a, i, i + 1) if build_forest else None
+            next_frontier = {}
+            for node in frontier.values():
+                for action in self.cell_actions(node.state, a):
+                    if action.startswith('s'):
+                        target = int(action[1:])
+                        if target not in next_frontier:
+                            next_frontier[target] = GSSNode(target, i + 1)
+                        next_frontier[target].edges[node] = leaf
+
+            if not next_frontier:
+                return 'ERROR: input cannot be parsed by given grammar', None
+            frontier = next_frontier
+
+    def reduce_all(self, frontier, i, a, forest):
+        # Pending reductions are (node, production, first predecessor or None, edge the path must use or None).
+        pending = deque()
+        for node in frontier.values():
+            self.queue_reductions(pending, node, a, None)
+        same_level = False
+
+        while pending:
+            v, production, first, required = pending.popleft()
+            head, length = self.productions[production]
+            for u, labels in list(self.paths(v, length, first, required)):
+                target = self.slr_parser.goto_cell(u.state, head)
+                label = self.symbol_node(forest, head, u.level, i, labels)
+                w = frontier.get(target)
+
+                if w is None:
+                    w = GSSNode(target, i)
+                    w.edges[u] = label
+                    frontier[target] = w
+                    self.queue_reductions(pending, w, a, u, new_node=True)
+                elif u not in w.edges:
+                    w.edges[u] = label
+                    if not same_level:
+                        self.queue_reductions(pending, w, a, u)
+                    else:
+                        # Farshi's correction: a new edge under a same-level node can extend paths of
+                        # any node in the frontier, not only those starting at w.
+                        for x in frontier.values():
+                            for r in self.reductions(x.state, a):
+                                if self.productions[r][1]:
+                                    pending.append((x, r, None, (w, u)))
+                same_level = same_level or u.level == i
+
+    def queue_reductions(self, pending, node, a, via, new_node=False):
+        for production in self.reductions(node.state, a):
+            if self.productions[production][1]:
+                pending.append((node, production, via, None))
+            elif via is None or new_node:
+                pending.append((node, production, None, None))
+
+    @staticmethod
+    def paths(v, length, first, required):
+        if length == 0:
+            yield v, []
+            return
+        stack = [(v, length, [], required is None)]
+        while stack:
+            node, remaining, labels, used = stack.pop()
+            for u, label in node.edges.items():
+                if remaining == length and first is not None and u is not first:
+                    continue
+                edge_used = used or (node, u) == required
+                if remaining == 1:
+                    if edge_used:
+                        yield u, [label] + labels
+                else:
+                    stack.append((u, remaining - 1, [label] + labels, edge_used))
+
+    @staticmethod
+    def symbol_node(forest, head, start, end, labels):
+        if forest is None:
+            return None
+        key = (head, start, end)
+        if key not in forest:
+            forest[key] = SPPFNode(head, start, end)
+        forest[key].families.add(tuple(labels))
+        return forest[key]
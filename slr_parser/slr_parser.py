@@ -1,196 +1,745 @@
 #!/usr/bin/env python3
 
 from slr_parser.grammar import Grammar
+from slr_parser.trace import ResultsSink, ConsoleTableSink, CsvSink, JsonlSink
 import argparse
+import copy
 import csv
+import hashlib
+import os
+import pickle
+import sys
+
+SHIFT = 0
+REDUCE = 1
+ACCEPT = 2
+CONFLICT = 3
+
+SLR_CACHE_DIR = '.slr_cache'
+SLR_CACHE_VERSION = 7
 
 def first_follow(G):
-    def union(set_1, set_2):
-        original_size = len(set_1)
-        set_1.update(set_2)
-        return original_size != len(set_1)
-
-    first = {symbol: set() for symbol in G.symbols}
-    first.update((terminal, {terminal}) for terminal in G.terminals)
-    follow = {symbol: set() for symbol in G.nonterminals}
-    follow[G.start].add('$')
-
-    while True:
-        updated = False
-
-        for head, bodies in G.grammar.items():
-            for body in bodies:
-                for symbol in body:
-                    if symbol != '^':
-                        updated |= union(first[head], first[symbol] - {'^'})
-                        if '^' not in first[symbol]:
+    # Terminals (and '$') are interned to bits; FIRST and FOLLOW are closures of the begins-with and
+    # followed-by relations, each computed SCC by SCC with digraph().
+    terminal_bits = {terminal: 1 << j for j, terminal in enumerate(sorted(G.terminals))}
+    terminal_bits['$'] = 1 << len(terminal_bits)
+    bodies = [(head, [symbol for symbol in body if symbol != '^']) for head, rule in G.grammar.items() for body in rule]
+
+    nullable = set()
+    pending = []
+    occurrences = {X: [] for X in G.nonterminals}
+    for k, (head, body) in enumerate(bodies):
+        pending.append(len(body) if all(symbol in G.nonterminals for symbol in body) else -1)
+        if pending[k] == 0:
+            nullable.add(head)
+        elif pending[k] > 0:
+            for symbol in body:
+                occurrences[symbol].append(k)
+    worklist = list(nullable)
+    while worklist:
+        for k in occurrences[worklist.pop()]:
+            pending[k] -= 1
+            if pending[k] == 0 and bodies[k][0] not in nullable:
+                nullable.add(bodies[k][0])
+                worklist.append(bodies[k][0])
+
+    direct_first = {X: 0 for X in G.nonterminals}
+    begins_with = {X: [] for X in G.nonterminals}
+    for head, body in bodies:
+        for symbol in body:
+            if symbol in terminal_bits:
+                direct_first[head] |= terminal_bits[symbol]
+                break
+            begins_with[head].append(symbol)
+            if symbol not in nullable:
+                break
+    first_masks = digraph(G.nonterminals, begins_with, direct_first)
+
+    direct_follow = {X: 0 for X in G.nonterminals}
+    direct_follow[G.start] = terminal_bits['$']
+    followed_by = {X: [] for X in G.nonterminals}
+    for head, body in bodies:
+        suffix_first = 0
+        suffix_nullable = True
+        for symbol in reversed(body):
+            if symbol in terminal_bits:
+                suffix_first = terminal_bits[symbol]
+                suffix_nullable = False
+                continue
+            direct_follow[symbol] |= suffix_first
+            if suffix_nullable:
+                followed_by[symbol].append(head)
+            if symbol in nullable:
+                suffix_first |= first_masks[symbol]
+            else:
+                suffix_first = first_masks[symbol]
+                suffix_nullable = False
+    follow_masks = digraph(G.nonterminals, followed_by, direct_follow)
+
+    bit_symbols = list(terminal_bits)
+
+    def mask_symbols(mask):
+        symbols = set()
+        while mask:
+            low = mask & -mask
+            symbols.add(bit_symbols[low.bit_length() - 1])
+            mask ^= low
+        return symbols
+
+    first = {terminal: {terminal} for terminal in G.terminals}
+    for X in G.nonterminals:
+        first[X] = mask_symbols(first_masks[X]) | ({'^'} if X in nullable else set())
+    follow = {X: mask_symbols(follow_masks[X]) for X in G.nonterminals}
+    return first, follow
+
+
+def digraph(nodes, relation, initial):
+    # DeRemer–Pennello digraph: F(x) = F'(x) ∪ ⋃{F(y) | x R y}, one SCC at a time.
+    result = {}
+    depth = {}
+    stack = []
+
+    for root in nodes:
+        if root in depth:
+            continue
+        stack.append(root)
+        depth[root] = len(stack)
+        result[root] = copy.copy(initial[root])
+        work = [(root, len(stack), iter(relation.get(root, ())))]
+
+        while work:
+            x, d, successors = work[-1]
+            for y in successors:
+                if y not in depth:
+                    stack.append(y)
+                    depth[y] = len(stack)
+                    result[y] = copy.copy(initial[y])
+                    work.append((y, len(stack), iter(relation.get(y, ()))))
+                    break
+                depth[x] = min(depth[x], depth[y])
+                result[x] |= result[y]
+            else:
+                work.pop()
+                if depth[x] == d:
+                    while True:
+                        top = stack.pop()
+                        depth[top] = float('inf')
+                        result[top] = result[x]
+                        if top == x:
                             break
-                    else:
-                        updated |= union(first[head], {'^'})
-                else:
-                    updated |= union(first[head], {'^'})
-
-                aux = follow[head]
-                for symbol in reversed(body):
-                    if symbol == '^':
-                        continue
-                    if symbol in follow:
-                        updated |= union(follow[symbol], aux - {'^'})
-                    if '^' in first[symbol]:
-                        aux = aux | first[symbol]
-                    else:
-                        aux = first[symbol]
+                if work:
+                    parent = work[-1][0]
+                    depth[parent] = min(depth[parent], depth[x])
+                    result[parent] |= result[x]
 
-        if not updated:
-            return first, follow
+    return result
 
 
 class SLRParser:
-    def __init__(self, G):
+    def __init__(self, G, mode='slr', matrices=False, compressed=False, unit_elimination=False,
+                 unit_state_limit=None):
+        if mode not in ('slr', 'lalr'):
+            raise ValueError(f'Unknown table mode \'{mode}\'.')
+        self.mode = mode
         self.G_prime = Grammar(f"{G.start}' -> {G.start}\n{G.grammar_str}")
         self.G_indexed = [
             {'head': head, 'body': body}
             for head, bodies in self.G_prime.grammar.items()
             for body in bodies
         ]
+        self.production_indices = {head: [] for head in self.G_prime.grammar}
+        for i, production in enumerate(self.G_indexed):
+            self.production_indices[production['head']].append(i)
+        self.nonterminal_closures = {}
         self.first, self.follow = first_follow(self.G_prime)
+        self.transitions = []
         self.C = self.items(self.G_prime)
-        self.parsing_table = self.construct_parsing_table()
+        self.lookaheads = self.lalr_lookaheads() if mode == 'lalr' else None
         self.action_symbols = list(self.G_prime.terminals) + ['$']
+        self.parsing_table = self.construct_parsing_table()
+        self.unit_bypasses = self.eliminate_unit_reductions(unit_state_limit) if unit_elimination else {}
+        self.action_rows, self.reduce_gotos = self.encode_parsing_table()
         self.max_nonterminal_len = max(len(nonterminal) for nonterminal in self.G_prime.nonterminals)
+        self.matrices = self.construct_matrices() if matrices else None
+        self.compressed = self.construct_compressed() if compressed else None
+        if matrices or compressed:
+            # The matrices or packed vectors replace the dense ACTION/GOTO rows for every lookup.
+            self.parsing_table = None
+            self.action_rows = None
+            self.reduce_gotos = [(body_len, head, None) for body_len, head, _ in self.reduce_gotos]
+
+    @staticmethod
+    def grammar_fingerprint(G, mode, matrices=False, compressed=False, unit_elimination=False, unit_state_limit=None):
+        options = f'{SLR_CACHE_VERSION}\n{mode}\n{matrices}\n{compressed}\n{unit_elimination}\n{unit_state_limit}'
+        digest = hashlib.sha256(f'{options}\n{G.grammar_str}'.encode('utf-8'))
+        return digest.hexdigest()
+
+    @classmethod
+    def load(cls, G, mode='slr', cache_dir=SLR_CACHE_DIR, matrices=False, compressed=False, unit_elimination=False,
+             unit_state_limit=None):
+        # Reuse the pickled augmented grammar, LR(0) collection and tables when the grammar text is unchanged.
+        fingerprint = cls.grammar_fingerprint(G, mode, matrices, compressed, unit_elimination, unit_state_limit)
+        cache_path = os.path.join(cache_dir, f'slr_{mode}_{fingerprint[:16]}.pickle')
+
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('fingerprint') == fingerprint:
+                slr_parser = cls.__new__(cls)
+                slr_parser.__dict__.update(cached['state'])
+                return slr_parser
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+            pass
+
+        slr_parser = cls(G, mode, matrices, compressed, unit_elimination, unit_state_limit)
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = f'{cache_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump({'fingerprint': fingerprint, 'state': slr_parser.__dict__}, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+        return slr_parser
+
+    def symbol_after_dot(self, item):
+        i, dot_pos = item
+        body = self.G_indexed[i]['body']
+        if dot_pos < len(body) and body != ['^']:
+            return body[dot_pos]
+        return None
+
+    def nonterminal_closure(self, X):
+        if X not in self.nonterminal_closures:
+            closure = []
+            seen = {X}
+            pending = [X]
+            while pending:
+                for i in self.production_indices[pending.pop()]:
+                    closure.append((i, 0))
+                    symbol = self.symbol_after_dot((i, 0))
+                    if symbol in self.G_prime.nonterminals and symbol not in seen:
+                        seen.add(symbol)
+                        pending.append(symbol)
+            self.nonterminal_closures[X] = closure
+        return self.nonterminal_closures[X]
 
     def CLOSURE(self, I):
-        J = I.copy()
-
-        while True:
-            original_size = len(J)
+        J = list(I)
+        seen = set(J)
+        expanded = set()
 
-            for i, dot_pos in J:
-                body = self.G_indexed[i]['body']
-                if dot_pos < len(body):
-                    symbol_after_dot = body[dot_pos]
-                    if symbol_after_dot in self.G_prime.nonterminals:
-                        for body in self.G_prime.grammar[symbol_after_dot]:
-                            new_item = (self.G_indexed.index({'head': symbol_after_dot, 'body': body}), 0)
-                            if new_item not in J:
-                                J.append(new_item)
+        for item in I:
+            symbol = self.symbol_after_dot(item)
+            if symbol in self.G_prime.nonterminals and symbol not in expanded:
+                expanded.add(symbol)
+                for new_item in self.nonterminal_closure(symbol):
+                    if new_item not in seen:
+                        seen.add(new_item)
+                        J.append(new_item)
 
-            if len(J) == original_size:
-                return J
+        return J
 
     def GOTO(self, I, X):
-        goto = []
-
-        for i, dot_pos in I:
-            body = self.G_indexed[i]['body']
-            if dot_pos < len(body) and body[dot_pos] == X:
-                for new_item in self.CLOSURE([(i, dot_pos + 1)]):
-                    if new_item not in goto:
-                        goto.append(new_item)
-
-        return goto
+        return self.CLOSURE(sorted({(i, dot_pos + 1) for i, dot_pos in I if self.symbol_after_dot((i, dot_pos)) == X}))
 
     def items(self, G_prime):
-        C = [self.CLOSURE([(0, 0)])]
+        initial_kernel = ((0, 0),)
+        C = [self.CLOSURE(initial_kernel)]
+        state_ids = {frozenset(initial_kernel): 0}
+        self.transitions = []
+
+        while len(self.transitions) < len(C):
+            kernels = {}
+            for i, dot_pos in C[len(self.transitions)]:
+                X = self.symbol_after_dot((i, dot_pos))
+                if X is not None:
+                    kernels.setdefault(X, []).append((i, dot_pos + 1))
+
+            state_transitions = {}
+            for X, kernel in kernels.items():
+                key = frozenset(kernel)
+                if key not in state_ids:
+                    state_ids[key] = len(C)
+                    C.append(self.CLOSURE(kernel))
+                state_transitions[X] = state_ids[key]
+            self.transitions.append(state_transitions)
+
+        return C
+
+    def lalr_lookaheads(self):
+        nonterminals = self.G_prime.nonterminals
+        nullable = {X for X in nonterminals if '^' in self.first[X]}
+        start_symbol = self.G_indexed[0]['body'][0]
+        edges = [(p, X) for p, row in enumerate(self.transitions) for X in row if X in nonterminals]
+
+        direct_reads = {}
+        reads = {}
+        for p, A in edges:
+            q = self.transitions[p][A]
+            direct_reads[(p, A)] = {t for t in self.transitions[q] if t not in nonterminals}
+            if p == 0 and A == start_symbol:
+                direct_reads[(p, A)].add('$')
+            reads[(p, A)] = [(q, C) for C in self.transitions[q] if C in nullable]
+
+        includes = {}
+        lookback = {}
+        for p_start, B in edges:
+            for i in self.production_indices[B]:
+                body = self.G_indexed[i]['body']
+                if body == ['^']:
+                    body = []
+                nullable_suffix = len(body)
+                while nullable_suffix > 0 and body[nullable_suffix - 1] in nullable:
+                    nullable_suffix -= 1
+
+                p = p_start
+                for k, symbol in enumerate(body):
+                    if symbol in nonterminals and k + 1 >= nullable_suffix:
+                        includes.setdefault((p, symbol), []).append((p_start, B))
+                    p = self.transitions[p][symbol]
+                lookback.setdefault((p, i), []).append((p_start, B))
+
+        read = digraph(edges, reads, direct_reads)
+        follow = digraph(edges, includes, read)
+
+        lookaheads = {}
+        for key, sources in lookback.items():
+            lookaheads[key] = set().union(*(follow[edge] for edge in sources))
+        return lookaheads
+
+    def reduce_lookaheads(self, state, i):
+        if self.lookaheads is None:
+            return self.follow[self.G_indexed[i]['head']]
+        return self.lookaheads.get((state, i), ())
+
+    def table_entries(self):
+        # Every candidate ACTION ('sN', 'rN', 'acc') and GOTO (int) entry, conflicts included.
+        for state, I in enumerate(self.C):
+            for i, dot_pos in I:
+                head = self.G_indexed[i]['head']
+                symbol = self.symbol_after_dot((i, dot_pos))
+                if symbol is not None:
+                    if symbol in self.G_prime.terminals:
+                        yield state, symbol, f's{self.transitions[state][symbol]}'
+                elif head == self.G_prime.start:
+                    yield state, '$', 'acc'
+                else:
+                    for a in self.reduce_lookaheads(state, i):
+                        yield state, a, f'r{i}'
+
+            for X, target in self.transitions[state].items():
+                if X in self.G_prime.nonterminals:
+                    yield state, X, target
+
+    def construct_parsing_table(self):
+        parsing_table = {r: {} for r in range(len(self.C))}
+
+        for state, symbol, action in self.table_entries():
+            if isinstance(action, int) or action == 'acc':
+                parsing_table[state][symbol] = action
+            else:
+                self.add_action(parsing_table[state], symbol, action)
+
+        return parsing_table
+
+    def eliminate_unit_reductions(self, state_limit=None):
+        # A GOTO into a state that would reduce a unit production A -> B is redirected to a merged state whose
+        # action on each lookahead is the one reached after all such reductions, via GOTO from the same
+        # predecessor. Chains are followed through the original GOTO entries and the merged rows are keyed by
+        # content, so the pass terminates; the rewrites are applied at the end. Merged rows depend on the
+        # predecessor, so the table can grow by a large factor; past state_limit merged states, the remaining
+        # GOTO entries keep their original targets.
+        unit_productions = {
+            i for i, production in enumerate(self.G_indexed)
+            if i and len(production['body']) == 1 and production['body'][0] in self.G_prime.nonterminals
+        }
+        table = self.parsing_table
+        unit_states = {state for state, row in table.items()
+                       if any(self.is_unit_reduction(action, unit_productions) for action in row.values())}
+        merged_states = {}
+        unit_bypasses = {}
+        rewrites = []
+        worklist = list(table)
+
+        while worklist:
+            p = worklist.pop()
+            resolved = {}
+            for B, q in [(X, target) for X, target in table[p].items() if X in self.G_prime.nonterminals]:
+                if q not in unit_states:
+                    continue
+                bypass = self.bypass_row(p, q, unit_productions, resolved)
+                if bypass is None:
+                    continue
+                row, chains = bypass
+                key = (frozenset(row.items()), frozenset(chains.items()))
+                if key not in merged_states:
+                    if state_limit is not None and len(merged_states) >= state_limit:
+                        continue
+                    merged_states[key] = len(table)
+                    table[len(table)] = row
+                    unit_bypasses[merged_states[key]] = chains
+                    worklist.append(merged_states[key])
+                rewrites.append((p, B, merged_states[key]))
+
+        for p, B, target in rewrites:
+            table[p][B] = target
+        return unit_bypasses
+
+    def resolve_unit_chain(self, p, q, a, unit_productions, resolved):
+        # (action, state providing it, chain) after the unit reductions from q on lookahead a, or None on a cycle
+        # or a missing GOTO. Chains are linked tuples (production, rest) so that overlapping chains share storage.
+        walk = []
+        state = q
+        while (state, a) not in resolved:
+            action = self.parsing_table[state].get(a, '')
+            if not self.is_unit_reduction(action, unit_productions):
+                resolved[(state, a)] = (action, state, None)
+                break
+            if state in walk:
+                resolved[(state, a)] = None
+                break
+            walk.append(state)
+            i = int(action[1:])
+            state = self.parsing_table[p].get(self.G_indexed[i]['head'])
+            if state is None:
+                resolved[(walk[-1], a)] = None
+                walk.pop()
+                break
 
-        while True:
-            original_size = len(C)
-
-            for I in C:
-                for X in G_prime.symbols:
-                    goto = self.GOTO(I, X)
-                    if goto and goto not in C:
-                        C.append(goto)
-
-            if len(C) == original_size:
-                return C
-
-   def print_info(self):   
-       goto_symbols = self.G_prime.nonterminals - {self.G_prime.start}
-       parsing_table_symbols = self.action_symbols + list(goto_symbols)
-   
-       # Сохранение таблицы в CSV
-       with open('slr_table.csv', 'w', newline='', encoding='utf-8') as csvfile:
-           writer = csv.writer(csvfile)
-           
-           # Заголовок таблицы
-           header = ['STATE'] + list(parsing_table_symbols)
-           writer.writerow(header)
-           
-           # Данные таблицы
-           for s in self.parsing_table:
-               row = [s]
-               for symbol in parsing_table_symbols:
-                   row.append(self.parsing_table[s].get(symbol, ''))
-               writer.writerow(row)
-       
-       print('\nПарсинг таблица сохранена в файл slr_table.csv')
+        while walk:
+            state = walk.pop()
+            i = int(self.parsing_table[state][a][1:])
+            rest = resolved[(self.parsing_table[p][self.G_indexed[i]['head']], a)]
+            resolved[(state, a)] = None if rest is None else (rest[0], rest[1], (i, rest[2]))
+        return resolved[(q, a)]
+
+    def bypass_row(self, p, q, unit_productions, resolved):
+        table = self.parsing_table
+        row = {a: action for a, action in table[q].items() if isinstance(action, str)}
+        chains = {}
+        sources = {q}
+        for a, action in table[q].items():
+            if not self.is_unit_reduction(action, unit_productions):
+                continue
+            result = self.resolve_unit_chain(p, q, a, unit_productions, resolved)
+            if result is None:
+                return None
+            action, state, chains[a] = result
+            if action:
+                row[a] = action
+                sources.add(state)
+            else:
+                del row[a]
+        if not chains:
+            return None
+
+        # GOTO on X is only taken from the merged state after reducing input that starts at the next token, so
+        # X must derive a string starting with one of the row's lookaheads or be nullable. Dropping the other
+        # entries lets predecessors share merged rows and avoids spurious GOTO disagreements.
+        lookaheads = set(row)
+        for state in sources:
+            for X, target in table[state].items():
+                if X in self.G_prime.nonterminals and ('^' in self.first[X] or self.first[X] & lookaheads):
+                    if row.get(X, target) != target:
+                        return None
+                    row[X] = target
+        return row, chains
+
+    @staticmethod
+    def is_unit_reduction(action, unit_productions):
+        return isinstance(action, str) and action.startswith('r') and '/' not in action and \
+            int(action[1:]) in unit_productions
+
+    @staticmethod
+    def encode_action(action):
+        if '/' in action:
+            return CONFLICT
+        if action == 'acc':
+            return ACCEPT
+        if action.startswith('s'):
+            return int(action[1:]) << 2 | SHIFT
+        return int(action[1:]) << 2 | REDUCE
+
+    @staticmethod
+    def decode_action(code):
+        if code < 0:
+            return ''
+        tag = code & 3
+        if tag == SHIFT:
+            return f's{code >> 2}'
+        if tag == REDUCE:
+            return f'r{code >> 2}'
+        return 'acc' if tag == ACCEPT else '/'
+
+    def encode_parsing_table(self):
+        # ACTION cells become (value << 2) | tag; each production gets (body length, head, state -> GOTO target).
+        action_rows = [
+            {symbol: self.encode_action(action) for symbol, action in row.items()
+             if symbol not in self.G_prime.nonterminals}
+            for row in self.parsing_table.values()
+        ]
+
+        reduce_gotos = []
+        for production in self.G_indexed:
+            head = production['head']
+            body_len = 0 if production['body'] == ['^'] else len(production['body'])
+            targets = {state: row[head] for state, row in self.parsing_table.items() if head in row}
+            reduce_gotos.append((body_len, head, targets))
+
+        return action_rows, reduce_gotos
+
+    def construct_matrices(self):
+        try:
+            from slr_parser.table_matrix import TableMatrices
+        except ImportError as error:
+            raise ImportError('ACTION/GOTO matrices need NumPy; install it with \'pip install numpy\'.') from error
+        return TableMatrices.build(self)
+
+    def construct_compressed(self):
+        from slr_parser.compressed_table import CompressedTable
+        return CompressedTable.build(self)
+
+    def action_cell(self, s, a):
+        if self.compressed is not None:
+            if (s, a) in self.compressed.conflicts:
+                return self.compressed.conflicts[(s, a)]
+            return self.decode_action(self.compressed.action(s, self.compressed.terminal_ids[a]))
+        if self.matrices is not None:
+            return self.matrices.action_cell(s, a)
+        return self.parsing_table[s].get(a, '')
+
+    def goto_cell(self, s, X):
+        if self.compressed is not None:
+            return self.compressed.goto(s, self.compressed.nonterminal_ids[X])
+        if self.matrices is not None:
+            return self.matrices.goto_cell(s, X)
+        return self.parsing_table[s][X]
+
+    @staticmethod
+    def add_action(row, symbol, action):
+        existing = row.get(symbol)
+        if not existing:
+            row[symbol] = action
+        elif action not in existing.split('/'):
+            row[symbol] = f'{existing}/{action}'
+
+    def print_info(self):
+        if self.unit_bypasses:
+            print(f'\nУстранение цепных правил: {len(self.C)} -> {len(self.C) + len(self.unit_bypasses)} состояний')
+
+        if self.compressed is not None:
+            self.compressed.to_csv('slr_table_packed.csv')
+            print('\nСжатая парсинг таблица сохранена в файл slr_table_packed.csv')
+            return
+
+        if self.matrices is not None:
+            self.matrices.to_csv('slr_table.csv')
+            self.matrices.save('slr_table.npz')
+            print('\nПарсинг таблица сохранена в файлы slr_table.csv и slr_table.npz')
+            return
+
+        self.write_table('slr_table.csv')
+        print('\nПарсинг таблица сохранена в файл slr_table.csv')
+
+    def write_table(self, path):
+        goto_symbols = self.G_prime.nonterminals - {self.G_prime.start}
+        parsing_table_symbols = self.action_symbols + list(goto_symbols)
+
+        # Сохранение таблицы в CSV
+        with open(path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+
+            # Заголовок таблицы
+            header = ['STATE'] + list(parsing_table_symbols)
+            writer.writerow(header)
+
+            # Данные таблицы
+            for s in self.parsing_table:
+                row = [s]
+                for symbol in parsing_table_symbols:
+                    row.append(self.parsing_table[s].get(symbol, ''))
+                writer.writerow(row)
 
     def LR_parser(self, w):
+        sink = ResultsSink()
+        self.LR_trace(w, sink)
+        return sink.results
+
+    def LR_trace(self, w, sink):
+        # Runs the traced parse, handing each step to sink as it is taken; returns the final ACTION text.
         buffer = f'{w} $'.split()
         pointer = 0
-        a = buffer[pointer]
         stack = ['0']
         symbols = ['']
-        results = {
-            'step': [''],
-            'stack': ['STACK'] + stack,
-            'symbols': ['SYMBOLS'] + symbols,
-            'input': ['INPUT'],
-            'action': ['ACTION']
-        }
 
         step = 0
-        while True:
-            s = int(stack[-1])
-            step += 1
-            results['step'].append(f'({step})')
-            results['input'].append(' '.join(buffer[pointer:]))
-
-            if a not in self.action_symbols:
-                results['action'].append(f'ERROR: unrecognized symbol {a}')
-                break
-
-            action = self.parsing_table[s].get(a, '')
-
-            if not action:
-                results['action'].append('ERROR: input cannot be parsed by given grammar')
-                break
+        try:
+            while True:
+                s = int(stack[-1])
+                step += 1
+                a = buffer[pointer]
+                action = self.action_cell(s, a) if a in self.action_symbols else ''
+                chain = self.bypassed_productions(s, a) if action else []
+                bypassed = ''.join(f'reduce by {p["head"]} -> {" ".join(p["body"])}; ' for p in chain)
+                final = True
+
+                if a not in self.action_symbols:
+                    text = f'ERROR: unrecognized symbol {a}'
+                elif not action:
+                    text = 'ERROR: input cannot be parsed by given grammar'
+                elif '/' in action:
+                    conflict_type = 'reduce' if action.count('r') > 1 else 'shift'
+                    text = f'ERROR: {conflict_type}-reduce conflict at state {s}, symbol {a}'
+                elif action == 'acc':
+                    text = f'{bypassed}accept'
+                elif action.startswith('s'):
+                    text = f'{bypassed}shift'
+                    final = False
+                else:
+                    production = self.G_indexed[int(action[1:])]
+                    text = f'{bypassed}reduce by {production["head"]} -> {" ".join(production["body"])}'
+                    final = False
+
+                if final or sink.accepts(step):
+                    sink.write(step, stack, symbols, buffer, pointer, text)
+                if final:
+                    return text
+
+                if chain:
+                    symbols[-1] = chain[-1]['head']
+                if action.startswith('s'):
+                    stack.append(action[1:])
+                    symbols.append(a)
+                    pointer += 1
+                else:
+                    head = production['head']
+                    body = production['body']
+                    if body != ['^']:
+                        del stack[-len(body):]
+                        del symbols[-len(body):]
+                    stack.append(str(self.goto_cell(int(stack[-1]), head)))
+                    symbols.append(head)
+        finally:
+            sink.close()
+
+    def bypassed_productions(self, s, a):
+        chain = []
+        link = self.unit_bypasses.get(s, {}).get(a)
+        while link:
+            chain.append(self.G_indexed[link[0]])
+            link = link[1]
+        return chain
+
+    def parse(self, w):
+        # Same automaton as LR_parser, without the trace: returns 'accept' or the error it would report.
+        if self.compressed is not None:
+            return self.parse_compressed(w)
+        if self.matrices is not None:
+            return self.parse_matrices(w)
+        action_rows = self.action_rows
+        reduce_gotos = self.reduce_gotos
+        buffer = w.split()
+        buffer.append('$')
+        pointer = 0
+        stack = [0]
 
-            elif '/' in action:
+        while True:
+            s = stack[-1]
+            a = buffer[pointer]
+            code = action_rows[s].get(a)
+            if code is None:
+                if a not in self.action_symbols:
+                    return f'ERROR: unrecognized symbol {a}'
+                return 'ERROR: input cannot be parsed by given grammar'
+
+            tag = code & 3
+            if tag == SHIFT:
+                stack.append(code >> 2)
+                pointer += 1
+            elif tag == REDUCE:
+                body_len, _, targets = reduce_gotos[code >> 2]
+                if body_len:
+                    del stack[-body_len:]
+                stack.append(targets[stack[-1]])
+            elif tag == ACCEPT:
+                return 'accept'
+            else:
+                action = self.parsing_table[s][a]
                 conflict_type = 'reduce' if action.count('r') > 1 else 'shift'
-                results['action'].append(f'ERROR: {conflict_type}-reduce conflict at state {s}, symbol {a}')
-                break
+                return f'ERROR: {conflict_type}-reduce conflict at state {s}, symbol {a}'
+
+    def parse_compressed(self, w):
+        table = self.compressed
+        action_base, action_check, action_value = table.action_base, table.action_check, table.action_value
+        default_action = table.default_action
+        goto_base, goto_check, goto_value = table.goto_base, table.goto_check, table.goto_value
+        default_goto = table.default_goto
+        reductions = [(body_len, table.nonterminal_ids.get(head)) for body_len, head, _ in self.reduce_gotos]
+        terminal_ids = table.terminal_ids
+        buffer = w.split()
+        buffer.append('$')
+        pointer = 0
+        a = terminal_ids.get(buffer[0])
+        stack = [0]
 
-            elif action.startswith('s'):
-                stack.append(action[1:])
-                symbols.append(a)
-                results['stack'].append(' '.join(stack))
-                results['symbols'].append(' '.join(symbols[1:]))
-                results['action'].append('shift')
+        while True:
+            if a is None:
+                return f'ERROR: unrecognized symbol {buffer[pointer]}'
+            s = stack[-1]
+            index = action_base[s] + a
+            code = action_value[index] if action_check[index] == s else default_action[s]
+            if code < 0:
+                return 'ERROR: input cannot be parsed by given grammar'
+
+            tag = code & 3
+            if tag == SHIFT:
+                stack.append(code >> 2)
                 pointer += 1
-                a = buffer[pointer]
-
-            elif action.startswith('r'):
-                production = self.G_indexed[int(action[1:])]
-                head = production['head']
-                body = production['body']
-
-                if body != ['^']:
-                    stack = stack[:-len(body)]
-                    symbols = symbols[:-len(body)]
-
-                stack.append(str(self.parsing_table[int(stack[-1])][head]))
-                symbols.append(head)
-                results['stack'].append(' '.join(stack))
-                results['symbols'].append(' '.join(symbols[1:]))
-                results['action'].append(f'reduce by {head} -> {" ".join(body)}')
-
-            elif action == 'acc':
-                results['action'].append('accept')
-                break
+                a = terminal_ids.get(buffer[pointer])
+            elif tag == REDUCE:
+                body_len, X = reductions[code >> 2]
+                if body_len:
+                    del stack[-body_len:]
+                index = goto_base[X] + stack[-1]
+                stack.append(goto_value[index] if goto_check[index] == X else default_goto[X])
+            elif tag == ACCEPT:
+                return 'accept'
+            else:
+                action = table.conflicts[(s, buffer[pointer])]
+                conflict_type = 'reduce' if action.count('r') > 1 else 'shift'
+                return f'ERROR: {conflict_type}-reduce conflict at state {s}, symbol {buffer[pointer]}'
+
+    def parse_matrices(self, w):
+        matrices = self.matrices
+        action, goto, reductions = matrices.lookup_lists(self.reduce_gotos)
+        terminal_ids = matrices.terminal_ids
+        buffer = w.split()
+        buffer.append('$')
+        pointer = 0
+        stack = [0]
 
-        return results
+        while True:
+            s = stack[-1]
+            a = terminal_ids.get(buffer[pointer])
+            if a is None:
+                return f'ERROR: unrecognized symbol {buffer[pointer]}'
+            code = action[s][a]
+            if code < 0:
+                return 'ERROR: input cannot be parsed by given grammar'
+
+            tag = code & 3
+            if tag == SHIFT:
+                stack.append(code >> 2)
+                pointer += 1
+            elif tag == REDUCE:
+                body_len, X = reductions[code >> 2]
+                if body_len:
+                    del stack[-body_len:]
+                stack.append(goto[stack[-1]][X])
+            elif tag == ACCEPT:
+                return 'accept'
+            else:
+                actions = matrices.conflicts[(s, buffer[pointer])]
+                conflict_type = 'reduce' if sum(entry.startswith('r') for entry in actions) > 1 else 'shift'
+                return f'ERROR: {conflict_type}-reduce conflict at state {s}, symbol {buffer[pointer]}'
 
     def print_LR_parser(self, results):
         def print_line():
@@ -223,13 +772,80 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('grammar_file', type=argparse.FileType('r'), help='Path to the text file used as grammar')
     parser.add_argument('tokens', help='Tokens to be parsed, separated by spaces')
+    parser.add_argument('--mode', choices=('slr', 'lalr'), default='slr',
+                        help='Lookahead sets for reduce actions: SLR(1) FOLLOW sets or LALR(1) lookaheads')
+    parser.add_argument('--fast', action='store_true',
+                        help='Parse with the integer-encoded table and print only the outcome, without a trace')
+    parser.add_argument('--cache-dir', default=SLR_CACHE_DIR,
+                        help='Directory for the serialised automaton and tables, keyed by a hash of the grammar')
+    parser.add_argument('--no-cache', action='store_true', help='Always rebuild the automaton and tables')
+    parser.add_argument('--glr', action='store_true',
+                        help='Parse with the generalised LR driver, forking on conflicting table cells')
+    parser.add_argument('--forest', action='store_true',
+                        help='With --glr, build the shared packed parse forest and report the number of trees')
+    parser.add_argument('--unit-elimination', action='store_true',
+                        help='Bypass unit productions (A -> B) in the table so reduction chains take a single step')
+    parser.add_argument('--unit-state-limit', type=int,
+                        help='With --unit-elimination, add at most this many merged states')
+    parser.add_argument('--compressed', action='store_true',
+                        help='Pack ACTION/GOTO as default reductions plus row-displacement vectors and parse from them')
+    parser.add_argument('--matrix', action='store_true',
+                        help='Build NumPy ACTION/GOTO matrices, report all conflicts up front and export from them')
+    parser.add_argument('--trace-format', choices=('table', 'csv', 'jsonl'), default='table',
+                        help='How each parser step is written as it happens')
+    parser.add_argument('--trace-file', help='Write the trace to this file instead of stdout')
+    parser.add_argument('--trace-widths',
+                        help='Fixed table column widths STEP,STACK,SYMBOLS,INPUT,ACTION (default: adaptive)')
+    parser.add_argument('--trace-every', type=int, default=1, help='Write only every N-th step')
+    parser.add_argument('--trace-from', type=int, default=1, help='First step to write')
+    parser.add_argument('--trace-to', type=int, help='Last step to write (the final step is always written)')
     args = parser.parse_args()
+    widths = [int(width) for width in args.trace_widths.split(',')] if args.trace_widths else None
+    if widths is not None and (len(widths) != 5 or min(widths) < 2):
+        parser.error('--trace-widths needs five comma separated widths of at least 2')
 
     G = Grammar(args.grammar_file.read())
-    slr_parser = SLRParser(G)
+    try:
+        if args.no_cache:
+            slr_parser = SLRParser(G, args.mode, args.matrix, args.compressed, args.unit_elimination,
+                                   args.unit_state_limit)
+        else:
+            slr_parser = SLRParser.load(G, args.mode, args.cache_dir, args.matrix, args.compressed,
+                                        args.unit_elimination, args.unit_state_limit)
+    except ImportError as error:
+        parser.error(f'--matrix: {error}')
+    if slr_parser.matrices is not None:
+        for conflict in slr_parser.matrices.conflict_report():
+            print(f'CONFLICT: {conflict}')
     slr_parser.print_info()
-    results = slr_parser.LR_parser(args.tokens)
-    slr_parser.print_LR_parser(results)
+    if args.glr:
+        from slr_parser.glr import GLRParser
+        glr_parser = GLRParser(slr_parser)
+        if args.forest:
+            result, root = glr_parser.parse_forest(args.tokens)
+            print(result)
+            if root is not None:
+                print(f'Деревьев разбора: {root.count_trees()}')
+        else:
+            print(glr_parser.recognize(args.tokens))
+        return
+    if args.fast:
+        print(slr_parser.parse(args.tokens))
+        return
+
+    trace_file = open(args.trace_file, 'w', newline='', encoding='utf-8') if args.trace_file else sys.stdout
+    filters = {'every': args.trace_every, 'first': args.trace_from, 'last': args.trace_to}
+    if args.trace_format == 'csv':
+        sink = CsvSink(trace_file, **filters)
+    elif args.trace_format == 'jsonl':
+        sink = JsonlSink(trace_file, **filters)
+    else:
+        sink = ConsoleTableSink(widths, trace_file, **filters)
+    try:
+        slr_parser.LR_trace(args.tokens, sink)
+    finally:
+        if trace_file is not sys.stdout:
+            trace_file.close()
 
 
 if __name__ == '__main__':
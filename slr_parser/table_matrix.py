@@ -0,0 +1,128 @@
+import csv
+
+import numpy as np
+
+EMPTY = -1
+
+
+class TableMatrices:
+    def __init__(self, terminals, nonterminals, action, goto, conflicts, action_names):
+        self.terminals = terminals
+        self.nonterminals = nonterminals
+        self.terminal_ids = {symbol: j for j, symbol in enumerate(terminals)}
+        self.nonterminal_ids = {symbol: j for j, symbol in enumerate(nonterminals)}
+        self.action = action
+        self.goto = goto
+        self.conflicts = conflicts
+        self.action_names = action_names
+        self.lookups = None
+
+    @classmethod
+    def build(cls, slr_parser):
+        terminals = list(slr_parser.action_symbols)
+        nonterminals = sorted(slr_parser.G_prime.nonterminals - {slr_parser.G_prime.start})
+        terminal_ids = {symbol: j for j, symbol in enumerate(terminals)}
+        nonterminal_ids = {symbol: j for j, symbol in enumerate(nonterminals)}
+        n_states = len(slr_parser.parsing_table)
+
+        # Conflicting cells are split back into their actions; the rows include any unit-elimination states.
+        action_cells, action_codes, goto_cells, goto_targets = [], [], [], []
+        action_names = {}
+        for state, row in slr_parser.parsing_table.items():
+            for symbol, entry in row.items():
+                if isinstance(entry, int):
+                    goto_cells.append(state * len(nonterminals) + nonterminal_ids[symbol])
+                    goto_targets.append(entry)
+                    continue
+                for action in entry.split('/'):
+                    code = slr_parser.encode_action(action)
+                    action_names[code] = action
+                    action_cells.append(state * len(terminals) + terminal_ids[symbol])
+                    action_codes.append(code)
+
+        # Action codes are (state or production << 2) | tag, so smaller tables fit in 16-bit cells.
+        largest_code = max(n_states, len(slr_parser.G_indexed)) << 2 | 3
+        dtype = np.int16 if largest_code <= np.iinfo(np.int16).max else np.int32
+        action = np.full((n_states, len(terminals)), EMPTY, dtype=dtype)
+        goto = np.full((n_states, len(nonterminals)), EMPTY, dtype=dtype)
+        goto.flat[np.asarray(goto_cells, dtype=np.int64)] = goto_targets
+
+        # Distinct (cell, code) pairs; a cell that still occurs more than once holds a conflict.
+        pairs = np.unique(np.stack([np.asarray(action_cells, dtype=np.int64),
+                                    np.asarray(action_codes, dtype=np.int64)]), axis=1)
+        cells, codes = pairs
+        action.flat[cells] = codes
+        conflicted = cells[1:][cells[1:] == cells[:-1]]
+        conflicts = {}
+        if conflicted.size:
+            conflicted = np.unique(conflicted)
+            action.flat[conflicted] = slr_parser.encode_action('/')
+            for cell in conflicted:
+                members = codes[np.searchsorted(cells, cell, 'left'):np.searchsorted(cells, cell, 'right')]
+                state, column = divmod(int(cell), len(terminals))
+                conflicts[(state, terminals[column])] = [action_names[int(code)] for code in members]
+
+        return cls(terminals, nonterminals, action, goto, conflicts, action_names)
+
+    def lookup_lists(self, reduce_gotos):
+        # Plain nested lists index faster than NumPy scalars in a per-token loop; convert them once per table.
+        if self.lookups is None:
+            reductions = [(body_len, self.nonterminal_ids.get(head)) for body_len, head, _ in reduce_gotos]
+            self.lookups = (self.action.tolist(), self.goto.tolist(), reductions)
+        return self.lookups
+
+    def action_cell(self, state, symbol):
+        if (state, symbol) in self.conflicts:
+            return '/'.join(self.conflicts[(state, symbol)])
+        return self.action_names.get(int(self.action[state, self.terminal_ids[symbol]]), '')
+
+    def goto_cell(self, state, symbol):
+        return int(self.goto[state, self.nonterminal_ids[symbol]])
+
+    def conflict_report(self):
+        report = []
+        for (state, symbol), actions in sorted(self.conflicts.items()):
+            reduces = sum(action.startswith('r') for action in actions)
+            conflict_type = 'reduce' if reduces > 1 else 'shift'
+            report.append(f'{conflict_type}-reduce conflict at state {state}, symbol {symbol}: {"/".join(actions)}')
+        return report
+
+    def decoded_action(self):
+        # Decode each distinct code once, then index the object array with the matrix.
+        codes, inverse = np.unique(self.action, return_inverse=True)
+        names = np.array(['' if code == EMPTY else self.action_names.get(int(code), '') for code in codes],
+                         dtype=object)
+        decoded = names[inverse.reshape(self.action.shape)]
+        for (state, symbol), actions in self.conflicts.items():
+            decoded[state, self.terminal_ids[symbol]] = '/'.join(actions)
+        return decoded
+
+    def to_csv(self, path):
+        goto = self.goto.astype(object)
+        goto[self.goto == EMPTY] = ''
+        states = np.arange(len(self.action), dtype=np.int64).astype(object).reshape(-1, 1)
+        with open(path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['STATE'] + self.terminals + self.nonterminals)
+            writer.writerows(np.hstack([states, self.decoded_action(), goto]).tolist())
+
+    def save(self, path):
+        conflict_states = [state for state, _ in self.conflicts]
+        conflict_symbols = [symbol for _, symbol in self.conflicts]
+        conflict_actions = ['/'.join(actions) for actions in self.conflicts.values()]
+        np.savez(path, action=self.action, goto=self.goto, terminals=np.array(self.terminals, dtype=str),
+                 nonterminals=np.array(self.nonterminals, dtype=str),
+                 action_codes=np.array(list(self.action_names), dtype=np.int64),
+                 action_names=np.array(list(self.action_names.values()), dtype=str),
+                 conflict_states=np.array(conflict_states, dtype=np.int64),
+                 conflict_symbols=np.array(conflict_symbols, dtype=str),
+                 conflict_actions=np.array(conflict_actions, dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            conflicts = {(int(state), str(symbol)): str(actions).split('/') for state, symbol, actions in
+                         zip(data['conflict_states'], data['conflict_symbols'], data['conflict_actions'])}
+            action_names = {int(code): str(name) for code, name in zip(data['action_codes'], data['action_names'])}
+            return cls(data['terminals'].tolist(), data['nonterminals'].tolist(), data['action'], data['goto'],
+                       conflicts, action_names)
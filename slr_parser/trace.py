@@ -0,0 +1,131 @@
+import csv
+import json
+import sys
+from abc import ABC, abstractmethod
+
+HEADERS = ('', 'STACK', 'SYMBOLS', 'INPUT', 'ACTION')
+JUSTIFICATIONS = ('>', '<', '<', '>', '<')
+# Starting widths of an adaptive table: up to step (999), room for stacks to grow, and most reduce actions.
+ADAPTIVE_WIDTHS = (5, 16, 16, 0, 32)
+
+
+class TraceSink(ABC):
+    # Receives each parser step as it happens. Rows arrive as the live stack, symbol and input lists, which the
+    # sink must format immediately and not keep, so a trace never holds more than one step in memory.
+    def __init__(self, every=1, first=1, last=None):
+        self.every = every
+        self.first = first
+        self.last = last
+
+    def accepts(self, step):
+        if step < self.first or (self.last is not None and step > self.last):
+            return False
+        return (step - self.first) % self.every == 0
+
+    @abstractmethod
+    def write(self, step, stack, symbols, buffer, pointer, action):
+        pass
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def format_row(step, stack, symbols, buffer, pointer, action):
+        return f'({step})', ' '.join(stack), ' '.join(symbols[1:]), ' '.join(buffer[pointer:]), action
+
+
+class ResultsSink(TraceSink):
+    # Collects the whole trace in the dict layout print_LR_parser expects.
+    def __init__(self, every=1, first=1, last=None):
+        super().__init__(every, first, last)
+        self.results = {key: [header] for key, header in zip(('step', 'stack', 'symbols', 'input', 'action'),
+                                                              HEADERS)}
+
+    def write(self, step, stack, symbols, buffer, pointer, action):
+        for column, value in zip(self.results.values(), self.format_row(step, stack, symbols, buffer, pointer,
+                                                                        action)):
+            column.append(value)
+
+
+class ConsoleTableSink(TraceSink):
+    # With widths the table is fixed and long cells are cut, keeping the top of the stacks and the next input
+    # tokens. Without widths each column starts at ADAPTIVE_WIDTHS or its first cell (the input only shrinks), and
+    # a column that overflows doubles, with a rule printed whenever it does.
+    def __init__(self, widths=None, file=None, every=1, first=1, last=None):
+        super().__init__(every, first, last)
+        self.fixed = widths is not None
+        self.widths = list(widths) if widths is not None else [len(header) for header in HEADERS]
+        self.file = file or sys.stdout
+        self.started = False
+
+    def rule(self):
+        print('+' + '+'.join('-' * (width + 2) for width in self.widths) + '+', file=self.file, flush=True)
+
+    def cells(self, step, stack, symbols, buffer, pointer, action):
+        if not self.fixed:
+            return self.format_row(step, stack, symbols, buffer, pointer, action)
+
+        step_width, stack_width, symbols_width, input_width, action_width = self.widths
+        return (self.cut_left(f'({step})', step_width),
+                self.cut_left(' '.join(stack[-(stack_width // 2 + 1):]), stack_width),
+                self.cut_left(' '.join(symbols[1:][-(symbols_width // 2 + 1):]), symbols_width),
+                self.cut_right(' '.join(buffer[pointer:pointer + input_width // 2 + 1]), input_width),
+                self.cut_right(action, action_width))
+
+    @staticmethod
+    def cut_left(text, width):
+        return text if len(text) <= width else '…' + text[len(text) - width + 1:]
+
+    @staticmethod
+    def cut_right(text, width):
+        return text if len(text) <= width else text[:width - 1] + '…'
+
+    def write(self, step, stack, symbols, buffer, pointer, action):
+        cells = self.cells(step, stack, symbols, buffer, pointer, action)
+        widened = False
+        if not self.fixed:
+            for i, cell in enumerate(cells):
+                if not self.started:
+                    self.widths[i] = max(self.widths[i], len(cell), ADAPTIVE_WIDTHS[i])
+                elif len(cell) > self.widths[i]:
+                    self.widths[i] = max(len(cell), self.widths[i] * 2)
+                    widened = True
+
+        if not self.started:
+            self.started = True
+            self.rule()
+            print(''.join(f'| {header[:width]:^{width}} ' for header, width in zip(HEADERS, self.widths)) + '|',
+                  file=self.file)
+            self.rule()
+        elif widened:
+            self.rule()
+
+        print(''.join(f'| {cell:{justification}{width}} ' for cell, justification, width in
+                      zip(cells, JUSTIFICATIONS, self.widths)) + '|', file=self.file, flush=True)
+
+    def close(self):
+        if self.started:
+            self.rule()
+
+
+class CsvSink(TraceSink):
+    def __init__(self, file, every=1, first=1, last=None):
+        super().__init__(every, first, last)
+        self.file = file
+        self.writer = csv.writer(file)
+        self.writer.writerow(('STEP',) + HEADERS[1:])
+
+    def write(self, step, stack, symbols, buffer, pointer, action):
+        self.writer.writerow((step,) + self.format_row(step, stack, symbols, buffer, pointer, action)[1:])
+        self.file.flush()
+
+
+class JsonlSink(TraceSink):
+    def __init__(self, file, every=1, first=1, last=None):
+        super().__init__(every, first, last)
+        self.file = file
+
+    def write(self, step, stack, symbols, buffer, pointer, action):
+        record = {'step': step, 'stack': stack, 'symbols': symbols[1:], 'input': buffer[pointer:], 'action': action}
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.file.flush()
@@ -1,16 +1,118 @@
 from itertools import chain
 
-from src.grammar_utils import Grammar, Production
+from src.grammar_utils import Grammar, Production, Rule, is_repetition_rule
 from src.table import Line
 from src.util import is_nonterminal
 
 
-def create_analysis_table(language: Grammar, starting_symbol: str) -> list[Line]:
-    rule_positions = calculate_rule_positions(language)
+class FirstSetPool:
+    __slots__ = ("shared_sets", "nonterminal_firsts")
+
+    def __init__(self) -> None:
+        self.shared_sets: dict[frozenset[str], list[str]] = {}
+        self.nonterminal_firsts: dict[str, list[str]] = {}
+
+    def share(self, first_collection: list[str]) -> list[str]:
+        key = frozenset(first_collection)
+        shared = self.shared_sets.get(key)
+        if shared is None:
+            shared = self.shared_sets[key] = sorted(key)
+        return shared
+
+    def nonterminal_first(self, nonterminal: str, language: Grammar) -> list[str]:
+        shared = self.nonterminal_firsts.get(nonterminal)
+        if shared is None:
+            shared = self.nonterminal_firsts[nonterminal] = self.share(
+                list(chain.from_iterable(prod.first_set for prod in language.rules[nonterminal].productions)))
+        return shared
+
+
+def create_analysis_table(language: Grammar, starting_symbol: str,
+                          alternative_counts: dict[str, dict[str, int]] | None = None) -> list[Line]:
+    if alternative_counts:
+        language = order_by_frequency(language, alternative_counts)
+    rule_positions = calculate_rule_positions(language, starting_symbol)
+    first_set_pool = FirstSetPool()
     analysis_table = []
     counter = 0
     end_marker_set = False
 
+    for rule_obj in order_rules(language, starting_symbol):
+        rule_rows, end_marker_set = create_rule_rows(rule_obj, counter, language, rule_positions, end_marker_set,
+                                                     first_set_pool)
+        analysis_table.extend(rule_rows)
+        counter += len(rule_rows)
+
+    return analysis_table
+
+
+def create_rule_rows(rule_obj: Rule, counter: int, language: Grammar, rule_positions: dict[str, int],
+                     end_marker_set: bool, first_set_pool: FirstSetPool | None = None) -> tuple[list[Line], bool]:
+    first_set_pool = first_set_pool or FirstSetPool()
+    rule_rows = []
+    alternatives_count = len(rule_obj.productions)
+    target_pointer = counter + alternatives_count
+    repeating = is_repetition_rule(rule_obj)
+
+    for prod_index, prod_item in enumerate(rule_obj.productions):
+        is_error_case = (prod_index == alternatives_count - 1)
+        row_count = production_row_count(prod_item, repeating)
+
+        rule_rows.append(
+            Line(counter, rule_obj.nonterminal, first_set_pool.share(prod_item.first_set), shift=False,
+                 error=is_error_case, pointer=target_pointer if row_count else None,
+                 stack=False, end=False))
+        counter += 1
+        target_pointer += row_count
+
+    for prod_item in rule_obj.productions:
+        symbol_list = prod_item.symbols
+        last_index = len(symbol_list) - 1
+        for elem_index, elem in enumerate(symbol_list[:production_row_count(prod_item, repeating)]):
+            first_collection = get_symbol_first(elem, language, prod_item, first_set_pool)
+            next_pointer = determine_pointer(elem, symbol_list, elem_index, counter, rule_positions)
+            is_end, end_marker_set = check_end_condition(elem, symbol_list, elem_index, end_marker_set)
+            requires_stack = (elem_index != last_index) if is_nonterminal(elem) else False
+            if repeating and elem_index == last_index - 1 and not requires_stack:
+                next_pointer = rule_positions[rule_obj.nonterminal]
+
+            rule_rows.append(
+                Line(counter, elem, first_collection, shift=is_terminal_symbol(elem), error=True,
+                     pointer=next_pointer, stack=requires_stack,
+                     end=is_end))
+            counter += 1
+
+    return rule_rows, end_marker_set
+
+
+def production_row_count(prod_item: Production, repeating: bool = False) -> int:
+    symbol_list = prod_item.symbols
+    if not repeating:
+        return len(symbol_list)
+    if symbol_list == ["ε"]:
+        return 0
+    return len(symbol_list) if is_nonterminal(symbol_list[-2]) else len(symbol_list) - 1
+
+
+def rule_row_count(rule_obj: Rule) -> int:
+    repeating = is_repetition_rule(rule_obj)
+    return len(rule_obj.productions) + sum(production_row_count(prod, repeating) for prod in rule_obj.productions)
+
+
+def order_by_frequency(language: Grammar, alternative_counts: dict[str, dict[str, int]]) -> Grammar:
+    ordered_language = Grammar({})
+    for nt, rule_obj in language.rules.items():
+        rule_counts = alternative_counts.get(nt)
+        if not rule_counts:
+            ordered_language.rules[nt] = rule_obj
+            continue
+        ordered_productions = sorted(rule_obj.productions,
+                                     key=lambda prod: -rule_counts.get(" ".join(prod.symbols), 0))
+        ordered_language.rules[nt] = Rule(nt, ordered_productions)
+    return ordered_language
+
+
+def order_rules(language: Grammar, starting_symbol: str | None = None) -> list[Rule]:
     sorted_rules = []
     if starting_symbol in language.rules:
         sorted_rules.append(language.rules[starting_symbol])
@@ -19,49 +121,24 @@ def create_analysis_table(language: Grammar, starting_symbol: str) -> list[Line]
         if nt != starting_symbol:
             sorted_rules.append(rule_obj)
 
-    for rule_obj in sorted_rules:
-        production_sequences = [prod.symbols for prod in rule_obj.productions]
-
-        for prod_index, prod_item in enumerate(rule_obj.productions):
-            is_error_case = (prod_index == len(rule_obj.productions) - 1)
-            target_pointer = counter + len(rule_obj.productions) - prod_index + sum(
-                len(p.symbols) for p in rule_obj.productions[:prod_index])
-
-            analysis_table.append(
-                Line(counter, rule_obj.nonterminal, prod_item.first_set, shift=False, error=is_error_case,
-                     pointer=target_pointer,
-                     stack=False, end=False))
-            counter += 1
-
-        for seq_index, symbol_list in enumerate(production_sequences):
-            for elem_index, elem in enumerate(symbol_list):
-                first_collection = get_symbol_first(elem, language, rule_obj.productions[seq_index])
-                next_pointer = determine_pointer(elem, symbol_list, elem_index, counter, rule_positions)
-                is_end, end_marker_set = check_end_condition(elem, symbol_list, elem_index, end_marker_set)
-                requires_stack = (elem_index != len(symbol_list) - 1) if is_nonterminal(elem) else False
-
-                analysis_table.append(
-                    Line(counter, elem, first_collection, shift=is_terminal_symbol(elem), error=True,
-                         pointer=next_pointer, stack=requires_stack,
-                         end=is_end))
-                counter += 1
-
-    return analysis_table
+    return sorted_rules
 
 
-def calculate_rule_positions(language: Grammar) -> dict[str, int]:
+def calculate_rule_positions(language: Grammar, starting_symbol: str | None = None) -> dict[str, int]:
     rule_mapping = {}
     position = 0
-    for rule_obj in language.rules.values():
+    for rule_obj in order_rules(language, starting_symbol):
         rule_mapping[rule_obj.nonterminal] = position
-        position += sum(len(prod.symbols) + 1 for prod in rule_obj.productions)
+        position += rule_row_count(rule_obj)
     return rule_mapping
 
 
-def get_symbol_first(symbol_name: str, language: Grammar, prod_item: Production) -> list[str]:
+def get_symbol_first(symbol_name: str, language: Grammar, prod_item: Production,
+                     first_set_pool: FirstSetPool | None = None) -> list[str]:
+    first_set_pool = first_set_pool or FirstSetPool()
     if is_nonterminal(symbol_name):
-        return list(set(chain.from_iterable(prod.first_set for prod in language.rules[symbol_name].productions)))
-    return prod_item.first_set if symbol_name == "ε" else [symbol_name]
+        return first_set_pool.nonterminal_first(symbol_name, language)
+    return first_set_pool.share(prod_item.first_set if symbol_name == "ε" else [symbol_name])
 
 
 def determine_pointer(symbol_name: str, symbol_sequence: list[str], current_index: int, current_position: int,
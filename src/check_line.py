@@ -1,7 +1,10 @@
+from collections import Counter
+
 from src.table import Line
 
 
-def validate_input_sequence(input_sequence: list[str], analysis_table: list[Line]) -> str:
+def validate_input_sequence(input_sequence: list[str], analysis_table: list[Line],
+                            row_hits: Counter | None = None) -> str:
     input_index = 0
     table_position = 0
     stack_list = []
@@ -13,6 +16,8 @@ def validate_input_sequence(input_sequence: list[str], analysis_table: list[Line
 
         current_entry = table_lookup[table_position]
         current_symbol = input_sequence[input_index]
+        if row_hits is not None:
+            row_hits[table_position] += 1
 
         if current_symbol not in current_entry.first_set:
             if current_entry.error:
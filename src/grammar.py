@@ -1,182 +1,220 @@
-from src.grammar_utils import Grammar, Rule, Production
+from collections import deque
+from collections.abc import Iterable
+
+from src.grammar_utils import Grammar, Rule, Production, CompactGrammar, CompactRule, SymbolTable, EPSILON_ID
 from src.util import is_nonterminal
 
 
-def simplify_grammar(language: Grammar) -> Grammar:
-    new_language = Grammar({})
+def simplify_grammar(language: CompactGrammar) -> CompactGrammar:
+    symbols = language.symbols
+    new_rules = {}
 
-    for nonterminal, rule_obj in language.rules.items():
-        grouped_productions = group_by_common_prefix(rule_obj.productions)
+    for head, rule_obj in language.rules.items():
+        helper_rules = []
+        factored_bodies = factor_trie_node(build_prefix_trie(rule_obj.productions), head, symbols, helper_rules)
 
-        if len(grouped_productions) == len(rule_obj.productions):
-            new_language.rules[nonterminal] = rule_obj
+        if not helper_rules:
+            new_rules[head] = rule_obj
             continue
 
-        updated_rule = Rule(nonterminal, [])
-
-        for prefix_val, prod_list in grouped_productions.items():
-            if len(prod_list) == 1:
-                updated_rule.productions.append(prod_list[0])
-                continue
-
-            new_nt = f"<{nonterminal.strip('<>')}'>"
+        for helper_rule in helper_rules:
+            new_rules[helper_rule.head] = helper_rule
+        new_rules[head] = CompactRule(head, factored_bodies)
 
-            prefix_symbols = list(prefix_val)
-            updated_rule.productions.append(Production(prefix_symbols + [new_nt], []))
+    return CompactGrammar(symbols, new_rules)
 
-            remaining_productions = []
-            for prod_item in prod_list:
-                suffix_part = prod_item.symbols[len(prefix_symbols):]
-                remaining_productions.append(Production(suffix_part or ["ε"], []))
 
-            new_language.rules[new_nt] = Rule(new_nt, remaining_productions)
+def build_prefix_trie(prod_list: list[tuple[int, ...]]) -> dict:
+    root_node = {}
+    for body in prod_list:
+        current_node = root_node
+        for sym in body:
+            current_node = current_node.setdefault(sym, {})
+        current_node[None] = {}
+    return root_node
 
-        new_language.rules[nonterminal] = updated_rule
 
-    if any(len(group_by_common_prefix(rule_obj.productions)) < len(rule_obj.productions) for rule_obj in
-           new_language.rules.values()):
-        return simplify_grammar(new_language)
+def factor_trie_node(trie_node: dict, head: int, symbols: SymbolTable, helper_rules: list[CompactRule]) -> list[
+        tuple[int, ...]]:
+    bodies = []
 
-    return new_language
-
-
-def group_by_common_prefix(prod_list: list[Production]) -> dict[tuple, list[Production]]:
-    if not prod_list:
-        return {}
+    for sym, child_node in trie_node.items():
+        if sym is None:
+            bodies.append((EPSILON_ID,))
+            continue
 
-    result_map = {}
-    processed_indices = set()
+        prefix_symbols = [sym]
+        while len(child_node) == 1 and None not in child_node:
+            next_sym, child_node = next(iter(child_node.items()))
+            prefix_symbols.append(next_sym)
 
-    for i, prod1 in enumerate(prod_list):
-        if i in processed_indices:
+        if len(child_node) == 1:
+            bodies.append(tuple(prefix_symbols))
             continue
 
-        common_part = []
-        matching_productions = [prod1]
-        processed_indices.add(i)
+        new_nt = allocate_helper_name(head, symbols)
+        suffix_bodies = factor_trie_node(child_node, new_nt, symbols, helper_rules)
+        helper_rules.append(CompactRule(new_nt, suffix_bodies))
+        bodies.append((*prefix_symbols, new_nt))
 
-        for j, prod2 in enumerate(prod_list[i + 1:], i + 1):
-            if j in processed_indices:
-                continue
+    return bodies
 
-            match_length = 0
-            min_len = min(len(prod1.symbols), len(prod2.symbols))
 
-            for k in range(min_len):
-                if prod1.symbols[k] == prod2.symbols[k]:
-                    match_length = k + 1
-                else:
-                    break
+def allocate_helper_name(head: int, symbols: SymbolTable) -> int:
+    new_nt = f"<{symbols.names[head].strip('<>')}'>"
+    while new_nt in symbols.ids:
+        new_nt = f"<{new_nt.strip('<>')}'>"
+    return symbols.intern(new_nt)
 
-            if match_length > 0:
-                if not common_part or match_length >= len(common_part):
-                    if match_length > len(common_part):
-                        common_part = prod1.symbols[:match_length]
-                        matching_productions = [prod1, prod2]
-                    else:
-                        matching_productions.append(prod2)
-                    processed_indices.add(j)
 
-        if len(matching_productions) > 1:
-            prefix_key = tuple(common_part)
-            result_map[prefix_key] = matching_productions
-        else:
-            first_elem = prod1.symbols[0] if prod1.symbols else "ε"
-            prefix_key = (f"{first_elem}_unique_{i}",)
-            result_map[prefix_key] = [prod1]
+def eliminate_direct_recursion(language: CompactGrammar) -> CompactGrammar:
+    updated_rules = {}
+
+    for head, rule_obj in language.rules.items():
+        split_rules = split_direct_recursion(head, rule_obj.productions, language.symbols)
+        if split_rules is None:
+            updated_rules[head] = rule_obj
+            continue
 
-    return result_map
+        for new_rule in split_rules:
+            updated_rules[new_rule.head] = new_rule
 
+    return CompactGrammar(language.symbols, updated_rules)
 
-def eliminate_direct_recursion(language: Grammar) -> Grammar:
-    updated_language = Grammar({})
 
-    for nonterminal, rule_obj in language.rules.items():
-        recursive_prods = []
-        non_recursive_prods = []
+def split_direct_recursion(head: int, prod_list: list[tuple[int, ...]], symbols: SymbolTable) -> list[
+        CompactRule] | None:
+    recursive_prods = []
+    non_recursive_prods = []
 
-        for prod_item in rule_obj.productions:
-            if prod_item.symbols and prod_item.symbols[0] == nonterminal:
-                recursive_prods.append(prod_item.symbols[1:])
-            else:
-                non_recursive_prods.append(prod_item.symbols)
+    for body in prod_list:
+        if body and body[0] == head:
+            recursive_prods.append(body[1:])
+        else:
+            non_recursive_prods.append(body)
 
-        if recursive_prods:
-            new_nt = f"<{nonterminal.strip('<>')}r>"
-            updated_language.rules[new_nt] = Rule(new_nt, [])
+    if not recursive_prods:
+        return None
 
-            updated_language.rules[nonterminal] = Rule(nonterminal, [])
-            for prod_body in non_recursive_prods:
-                clean_body = [] if prod_body == ["ε"] else prod_body
-                new_body = clean_body + [new_nt]
-                updated_language.rules[nonterminal].productions.append(Production(new_body, []))
+    new_nt = symbols.intern(f"<{symbols.names[head].strip('<>')}r>")
+    tail_rule = CompactRule(new_nt, [body + (new_nt,) for body in recursive_prods] + [(EPSILON_ID,)])
 
-            updated_language.rules[new_nt].productions = [Production(body + [new_nt], []) for body in
-                                                          recursive_prods] + [Production(["ε"], [])]
-        else:
-            updated_language.rules[nonterminal] = rule_obj
+    head_rule = CompactRule(head, [])
+    for body in non_recursive_prods:
+        clean_body = () if body == (EPSILON_ID,) else body
+        head_rule.productions.append(clean_body + (new_nt,))
 
-    return updated_language
+    return [tail_rule, head_rule]
 
 
-def create_dependency_map(language: Grammar) -> dict[str, set[str]]:
+def create_dependency_map(language: CompactGrammar) -> dict[int, set[int]]:
     dependencies = dict()
-    for nonterminal, rule_obj in language.rules.items():
-        for prod_item in rule_obj.productions:
-            dependencies.setdefault(nonterminal, set())
-            if prod_item.symbols and prod_item.symbols[0] in language.rules:
-                dependencies[nonterminal].add(prod_item.symbols[0])
+    for head, rule_obj in language.rules.items():
+        for body in rule_obj.productions:
+            dependencies.setdefault(head, set())
+            if body and body[0] in language.rules:
+                dependencies[head].add(body[0])
     return dependencies
 
 
-def sort_topologically(dep_graph: dict[str, set[str]], start_nt: str) -> tuple[list[str], bool]:
-    visited_nodes = []
-    sorted_order = []
+def find_strong_components(dep_graph: dict[int, set[int]]) -> list[list[int]]:
+    index_map = {}
+    low_link = {}
+    node_stack = []
+    on_stack = set()
+    components = []
 
-    def traverse(node: str) -> None:
-        if node in visited_nodes:
-            visited_nodes.append(node)
-            return
-        visited_nodes.append(node)
-        for neighbor in dep_graph[node]:
-            if neighbor != node:
-                traverse(neighbor)
-        sorted_order.append(node)
+    for root in dep_graph:
+        if root in index_map:
+            continue
 
-    traverse(start_nt)
+        index_map[root] = low_link[root] = len(index_map)
+        node_stack.append(root)
+        on_stack.add(root)
+        call_stack = [(root, iter(dep_graph[root]))]
+
+        while call_stack:
+            node, neighbors = call_stack[-1]
+            descended = False
+
+            for neighbor in neighbors:
+                if neighbor not in index_map:
+                    index_map[neighbor] = low_link[neighbor] = len(index_map)
+                    node_stack.append(neighbor)
+                    on_stack.add(neighbor)
+                    call_stack.append((neighbor, iter(dep_graph[neighbor])))
+                    descended = True
+                    break
+                if neighbor in on_stack:
+                    low_link[node] = min(low_link[node], index_map[neighbor])
 
-    return sorted_order, len(visited_nodes) != len(sorted_order)
+            if descended:
+                continue
+
+            call_stack.pop()
+            if call_stack:
+                parent = call_stack[-1][0]
+                low_link[parent] = min(low_link[parent], low_link[node])
+
+            if low_link[node] == index_map[node]:
+                component = []
+                while True:
+                    member = node_stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+
+    return components
 
 
-def eliminate_indirect_recursion(language: Grammar) -> Grammar:
+def eliminate_indirect_recursion(language: CompactGrammar) -> CompactGrammar:
     dep_graph = create_dependency_map(language)
+    rule_order = {head: i for i, head in enumerate(language.rules)}
+    replaced_rules = {}
 
-    for node in dep_graph:
-        order, has_indirect = sort_topologically(dep_graph, node)
-        order = order[:-1]
-        if not has_indirect:
+    for component in find_strong_components(dep_graph):
+        if len(component) < 2:
             continue
 
-        for i, a_i in enumerate(order):
-            for j in range(i):
-                a_j = order[j]
-                new_prod_list = []
+        order = sorted(component, key=rule_order.get)
+        expanded_productions = {}
 
-                for prod_item in language.rules[a_i].productions:
-                    if prod_item.symbols and prod_item.symbols[0] == a_j:
-                        for a_j_prod in language.rules[a_j].productions:
-                            new_prod_list.append(Production(a_j_prod.symbols + prod_item.symbols[1:], []))
-                    else:
-                        new_prod_list.append(prod_item)
+        for a_i in order:
+            pending = deque(language.rules[a_i].productions)
+            new_prod_list = []
 
-                language.rules[a_i].productions = new_prod_list
+            while pending:
+                body = pending.popleft()
+                leading = body[0] if body else None
+                if leading in expanded_productions:
+                    pending.extendleft(a_j_body + body[1:] for a_j_body in reversed(expanded_productions[leading]))
+                else:
+                    new_prod_list.append(body)
 
-    return language
+            split_rules = split_direct_recursion(a_i, new_prod_list, language.symbols)
+            if split_rules is None:
+                replaced_rules[a_i] = [CompactRule(a_i, new_prod_list)]
+            else:
+                replaced_rules[a_i] = split_rules
+                new_prod_list = split_rules[-1].productions
+            expanded_productions[a_i] = new_prod_list
 
+    if not replaced_rules:
+        return language
 
-def remove_unused_rules(language: Grammar, start_symbol: str) -> Grammar:
+    updated_rules = {}
+    for head, rule_obj in language.rules.items():
+        for new_rule in replaced_rules.get(head, [rule_obj]):
+            updated_rules[new_rule.head] = new_rule
+
+    return CompactGrammar(language.symbols, updated_rules)
+
+
+def remove_unused_rules(language: CompactGrammar, start_symbol: str) -> CompactGrammar:
     accessible = set()
-    queue = [start_symbol]
+    queue = [language.symbols.ids[start_symbol]]
 
     while queue:
         current_nt = queue.pop()
@@ -184,128 +222,202 @@ def remove_unused_rules(language: Grammar, start_symbol: str) -> Grammar:
             continue
         accessible.add(current_nt)
         if current_nt in language.rules:
-            for prod_item in language.rules[current_nt].productions:
-                for sym in prod_item.symbols:
+            for body in language.rules[current_nt].productions:
+                for sym in body:
                     if sym in language.rules and sym not in accessible:
                         queue.append(sym)
 
-    filtered_rules = {nt: rule for nt, rule in language.rules.items() if nt in accessible}
-    return Grammar(filtered_rules)
-
-
-def compute_directing_sets(language: Grammar, start_symbol: str) -> Grammar:
-    first_collections = {}
-
-    for rule_obj in language.rules.values():
-        for prod_item in rule_obj.productions:
-            for sym in prod_item.symbols:
-                if not (is_nonterminal(sym)):
-                    first_collections[sym] = {sym}
-
-    for nonterminal in language.rules:
-        first_collections[nonterminal] = set()
-
-    changed_flag = True
-    while changed_flag:
-        changed_flag = False
-        for nonterminal, rule_obj in language.rules.items():
-            for prod_item in rule_obj.productions:
-                all_epsilon = True
-                for sym in prod_item.symbols:
-                    if sym == "ε":
-                        continue
-
-                    if not (is_nonterminal(sym)):
-                        if sym not in first_collections[nonterminal]:
-                            first_collections[nonterminal].add(sym)
-                            changed_flag = True
-                        all_epsilon = False
-                        break
+    filtered_rules = {head: rule for head, rule in language.rules.items() if head in accessible}
+    return CompactGrammar(language.symbols, filtered_rules)
 
-                    for s in first_collections.get(sym, set()):
-                        if s != "ε" and s not in first_collections[nonterminal]:
-                            first_collections[nonterminal].add(s)
-                            changed_flag = True
 
-                    if "ε" not in first_collections.get(sym, set()):
-                        all_epsilon = False
-                        break
+def compute_directing_sets(language: CompactGrammar, start_symbol: str) -> Grammar:
+    # The string form with directing sets is built only here, for save_grammar and the LL(1) check.
+    symbols = language.symbols
+    names = symbols.names
+    nullable = compute_nullable(language)
+    first_masks = compute_first_masks(language, nullable)
+    follow_masks = compute_follow_masks(language, symbols.ids[start_symbol], nullable, first_masks)
 
-                if all_epsilon and "ε" not in first_collections[nonterminal]:
-                    first_collections[nonterminal].add("ε")
-                    changed_flag = True
+    result_grammar = Grammar({})
+    for head, rule_obj in language.rules.items():
+        new_rule = Rule(names[head], [])
+        for body in rule_obj.productions:
+            directing_mask, derives_epsilon = sequence_first_mask(body, nullable, first_masks)
+            if derives_epsilon:
+                directing_mask |= follow_masks[head]
+
+            new_prod = Production(symbols=[names[sym] for sym in body],
+                                  first_set=mask_to_symbols(directing_mask, symbols))
+            new_rule.productions.append(new_prod)
 
-    follow_collections = {nonterminal: set() for nonterminal in language.rules}
+        result_grammar.rules[names[head]] = new_rule
 
-    follow_collections[start_symbol].add(language.rules[start_symbol].productions[0].symbols[-1])
+    return result_grammar
 
-    changed_flag = True
-    while changed_flag:
-        changed_flag = False
-        for nonterminal, rule_obj in language.rules.items():
-            for prod_item in rule_obj.productions:
-                for i, sym in enumerate(prod_item.symbols):
-                    if not (is_nonterminal(sym)) or sym == "ε":
-                        continue
 
-                    trailing_symbols = set()
-                    all_epsilon = True
+def compute_nullable(compact: CompactGrammar, cone: set[int] | None = None,
+                     nullable: list[bool] | None = None) -> list[bool]:
+    heads = compact.rules if cone is None else cone
+    nullable = resize_list(nullable, len(compact.symbols), False)
+    pending_counts = []
+    production_heads = []
+    occurrences = {head: [] for head in heads}
+    worklist = []
+
+    for head in heads:
+        nullable[head] = False
+
+    for head in heads:
+        for body in compact.rules[head].productions:
+            prod_id = len(pending_counts)
+            pending = 0
+            blocked = False
+            for sym in body:
+                if sym == EPSILON_ID:
+                    continue
+                if sym not in compact.rules or (sym not in occurrences and not nullable[sym]):
+                    blocked = True
+                    break
+                if sym in occurrences:
+                    occurrences[sym].append(prod_id)
+                    pending += 1
+            pending_counts.append(-1 if blocked else pending)
+            production_heads.append(head)
+            if not blocked and pending == 0:
+                worklist.append(head)
+
+    while worklist:
+        head = worklist.pop()
+        if nullable[head]:
+            continue
+        nullable[head] = True
+        for prod_id in occurrences[head]:
+            if pending_counts[prod_id] > 0:
+                pending_counts[prod_id] -= 1
+                if pending_counts[prod_id] == 0:
+                    worklist.append(production_heads[prod_id])
+
+    return nullable
+
+
+def compute_first_masks(compact: CompactGrammar, nullable: list[bool], cone: set[int] | None = None,
+                        first_masks: list[int] | None = None) -> list[int]:
+    heads = compact.rules if cone is None else cone
+    nonterminal_flags = compact.symbols.nonterminal_flags
+    known_count = len(first_masks) if first_masks else 0
+    first_masks = resize_list(first_masks, len(compact.symbols), 0)
+    for sym in range(known_count, len(compact.symbols)):
+        if not nonterminal_flags[sym] and sym != EPSILON_ID:
+            first_masks[sym] = 1 << sym
+    dependents = {head: set() for head in heads}
+
+    for head in heads:
+        first_masks[head] = 0
+
+    for head in heads:
+        for body in compact.rules[head].productions:
+            for sym in body:
+                if sym == EPSILON_ID:
+                    continue
+                if sym not in dependents:
+                    first_masks[head] |= first_masks[sym]
+                    if sym not in compact.rules or not nullable[sym]:
+                        break
+                    continue
+                if sym != head:
+                    dependents[sym].add(head)
+                if not nullable[sym]:
+                    break
 
-                    for j in range(i + 1, len(prod_item.symbols)):
-                        next_sym = prod_item.symbols[j]
-                        if next_sym == "ε":
-                            continue
+    propagate_masks(first_masks, dependents)
+    return first_masks
 
-                        sym_first = first_collections.get(next_sym, {next_sym})
-                        for s in sym_first:
-                            if s != "ε":
-                                trailing_symbols.add(s)
 
-                        if "ε" not in sym_first:
-                            all_epsilon = False
-                            break
+def compute_follow_masks(compact: CompactGrammar, start_id: int, nullable: list[bool], first_masks: list[int],
+                         cone: set[int] | None = None, follow_masks: list[int] | None = None,
+                         scanned_heads: Iterable[int] | None = None) -> list[int]:
+    targets = compact.rules if cone is None else cone
+    follow_masks = resize_list(follow_masks, len(compact.symbols), 0)
+    dependents = {head: set() for head in targets}
 
-                    if all_epsilon or i == len(prod_item.symbols) - 1:
-                        for follow_sym in follow_collections[nonterminal]:
-                            if follow_sym not in follow_collections[sym]:
-                                follow_collections[sym].add(follow_sym)
-                                changed_flag = True
+    for head in targets:
+        follow_masks[head] = 0
 
-                    for s in trailing_symbols:
-                        if s not in follow_collections[sym]:
-                            follow_collections[sym].add(s)
-                            changed_flag = True
+    end_symbol = compact.rules[start_id].productions[0][-1]
+    if start_id in targets and end_symbol != EPSILON_ID:
+        follow_masks[start_id] |= 1 << end_symbol
 
-    result_grammar = Grammar({})
-    for nonterminal, rule_obj in language.rules.items():
-        new_rule = Rule(nonterminal, [])
-        for prod_item in rule_obj.productions:
-            prod_first = compute_production_first(prod_item.symbols, first_collections)
-
-            derives_epsilon = True
-            for sym in prod_item.symbols:
-                if sym == "ε":
+    for head in compact.rules if scanned_heads is None else scanned_heads:
+        for body in compact.rules[head].productions:
+            trailing_mask = 0
+            trailing_nullable = True
+            for sym in reversed(body):
+                if sym == EPSILON_ID:
                     continue
-                sym_first = first_collections.get(sym, {sym})
-                if "ε" not in sym_first:
-                    derives_epsilon = False
-                    break
+                if sym in compact.rules:
+                    if sym in targets:
+                        follow_masks[sym] |= trailing_mask
+                        if trailing_nullable and sym != head:
+                            if head in targets:
+                                dependents[head].add(sym)
+                            else:
+                                follow_masks[sym] |= follow_masks[head]
+                    if nullable[sym]:
+                        trailing_mask |= first_masks[sym]
+                    else:
+                        trailing_mask = first_masks[sym]
+                        trailing_nullable = False
+                else:
+                    trailing_mask = 1 << sym
+                    trailing_nullable = False
 
-            directing_collection = set()
-            for s in prod_first:
-                if s != "ε":
-                    directing_collection.add(s)
+    propagate_masks(follow_masks, dependents)
+    return follow_masks
 
-            if derives_epsilon or "ε" in prod_first:
-                directing_collection.update(follow_collections[nonterminal])
 
-            new_prod = Production(symbols=prod_item.symbols,
-                                  first_set=[s for s in directing_collection if s != "ε"])
-            new_rule.productions.append(new_prod)
+def resize_list(values: list | None, size: int, default) -> list:
+    if values is None:
+        return [default] * size
+    values.extend([default] * (size - len(values)))
+    return values
 
-        result_grammar.rules[nonterminal] = new_rule
 
-    return result_grammar
+def propagate_masks(masks: list[int], dependents: dict[int, set[int]]) -> None:
+    worklist = [head for head in dependents if masks[head]]
+    queued = set(worklist)
+
+    while worklist:
+        source = worklist.pop()
+        queued.discard(source)
+        source_mask = masks[source]
+        for target in dependents[source]:
+            merged = masks[target] | source_mask
+            if merged != masks[target]:
+                masks[target] = merged
+                if target not in queued:
+                    queued.add(target)
+                    worklist.append(target)
+
+
+def sequence_first_mask(body: tuple[int, ...], nullable: list[bool], first_masks: list[int]) -> tuple[int, bool]:
+    result_mask = 0
+    for sym in body:
+        if sym == EPSILON_ID:
+            continue
+        result_mask |= first_masks[sym]
+        if not nullable[sym]:
+            return result_mask, False
+    return result_mask, True
+
+
+def mask_to_symbols(mask: int, symbols: SymbolTable) -> list[str]:
+    result_list = []
+    while mask:
+        low_bit = mask & -mask
+        result_list.append(symbols.names[low_bit.bit_length() - 1])
+        mask ^= low_bit
+    return result_list
 
 
 def compute_production_first(symbol_list: list[str], first_collections: dict[str, set[str]]) -> set[str]:
@@ -1,8 +1,16 @@
 import re
 from dataclasses import dataclass
 
+from src.util import is_nonterminal
 
-@dataclass
+EPSILON_ID = 0
+REPETITION_MARKER = "*"
+OPTION_MARKER = "?"
+GROUP_CLOSERS = {"}": "{", "]": "["}
+GROUP_TOKEN_PATTERN = re.compile(r"[{}\[\]|]|[^\s{}\[\]|]+")
+
+
+@dataclass(slots=True)
 class Production:
     symbols: list[str]
     first_set: list[str]
@@ -11,7 +19,7 @@ class Production:
         self.first_set = first_collection
 
 
-@dataclass
+@dataclass(slots=True)
 class Rule:
     nonterminal: str
     productions: list[Production]
@@ -20,7 +28,7 @@ class Rule:
         self.productions.append(Production(symbol_list, first_collection))
 
 
-@dataclass
+@dataclass(slots=True)
 class Grammar:
     rules: dict[str, Rule]
 
@@ -30,6 +38,67 @@ class Grammar:
         self.rules[nonterminal].add_production(symbol_list, first_collection)
 
 
+class SymbolTable:
+    __slots__ = ("names", "ids", "nonterminal_flags")
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        self.ids: dict[str, int] = {}
+        self.nonterminal_flags: list[bool] = []
+        self.intern("ε")
+
+    def intern(self, symbol_name: str) -> int:
+        symbol_id = self.ids.get(symbol_name)
+        if symbol_id is None:
+            symbol_id = len(self.names)
+            self.ids[symbol_name] = symbol_id
+            self.names.append(symbol_name)
+            self.nonterminal_flags.append(is_nonterminal(symbol_name))
+        return symbol_id
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class CompactRule:
+    __slots__ = ("head", "productions")
+
+    def __init__(self, head: int, productions: list[tuple[int, ...]]) -> None:
+        self.head = head
+        self.productions = productions
+
+
+class CompactGrammar:
+    __slots__ = ("symbols", "rules")
+
+    def __init__(self, symbols: SymbolTable, rules: dict[int, CompactRule]) -> None:
+        self.symbols = symbols
+        self.rules = rules
+
+    def to_grammar(self) -> Grammar:
+        names = self.symbols.names
+        language = Grammar(dict())
+        for head, rule_obj in self.rules.items():
+            language.rules[names[head]] = Rule(names[head], [Production([names[sym] for sym in body], [])
+                                                             for body in rule_obj.productions])
+        return language
+
+
+def compact_grammar(language: Grammar, symbols: SymbolTable | None = None) -> CompactGrammar:
+    symbols = symbols or SymbolTable()
+    for nonterminal in language.rules:
+        symbols.intern(nonterminal)
+
+    intern = symbols.intern
+    compact_rules = {}
+    for nonterminal, rule_obj in language.rules.items():
+        head = symbols.ids[nonterminal]
+        compact_rules[head] = CompactRule(head, [tuple(intern(sym) for sym in prod.symbols)
+                                                 for prod in rule_obj.productions])
+
+    return CompactGrammar(symbols, compact_rules)
+
+
 def parse_grammar_with_first_sets(content_lines: list[str]) -> Grammar:
     language = Grammar(dict())
     pattern = re.compile(r"^\s*(<.+>)\s*->(.*)\|\s*(.*)\s*$")
@@ -54,11 +123,67 @@ def parse_grammar_from_text(content_lines: list[str]) -> tuple[Grammar, str]:
             nonterminal, symbols = match.groups()
             if start_symbol is None:
                 start_symbol = nonterminal
-            language.add_production(nonterminal.strip(), symbols.strip().split(), [])
+            nonterminal = nonterminal.strip()
+            if nonterminal not in language.rules:
+                language.rules[nonterminal] = Rule(nonterminal, [])
+            language.add_production(nonterminal, expand_groups(nonterminal, symbols, language), [])
 
     return language, start_symbol
 
 
+def expand_groups(nonterminal: str, body: str, language: Grammar) -> list[str]:
+    open_groups = []
+    alternatives = [[]]
+
+    for token in GROUP_TOKEN_PATTERN.findall(body):
+        if token in GROUP_CLOSERS.values():
+            open_groups.append((token, alternatives))
+            alternatives = [[]]
+        elif token == "|" and open_groups:
+            alternatives.append([])
+        elif token in GROUP_CLOSERS:
+            if not open_groups or open_groups[-1][0] != GROUP_CLOSERS[token]:
+                raise ValueError(f"Unbalanced '{token}' in production for {nonterminal}")
+            _, enclosing = open_groups.pop()
+            if not all(alternatives):
+                raise ValueError(f"Empty group alternative in production for {nonterminal}")
+            group_nt = add_group_rule(nonterminal, REPETITION_MARKER if token == "}" else OPTION_MARKER,
+                                      alternatives, language)
+            alternatives = enclosing
+            alternatives[-1].append(group_nt)
+        else:
+            alternatives[-1].append(token)
+
+    if open_groups:
+        raise ValueError(f"Unclosed '{open_groups[-1][0]}' in production for {nonterminal}")
+    return alternatives[0]
+
+
+def add_group_rule(nonterminal: str, marker: str, alternatives: list[list[str]], language: Grammar) -> str:
+    base_name = nonterminal.strip("<>")
+    group_nt = f"<{base_name}{marker}>"
+    while group_nt in language.rules:
+        base_name += "'"
+        group_nt = f"<{base_name}{marker}>"
+
+    for symbol_list in alternatives:
+        language.add_production(group_nt, symbol_list + [group_nt] if marker == REPETITION_MARKER else symbol_list, [])
+    language.add_production(group_nt, ["ε"], [])
+    return group_nt
+
+
+def is_repetition_rule(rule_obj: Rule) -> bool:
+    if not rule_obj.nonterminal.endswith(f"{REPETITION_MARKER}>"):
+        return False
+    empty_count = 0
+    for prod in rule_obj.productions:
+        if prod.symbols == ["ε"]:
+            empty_count += 1
+        elif len(prod.symbols) < 2 or prod.symbols[-1] != rule_obj.nonterminal:
+            return False
+    return empty_count == 1
+
+
 def save_grammar(language: Grammar, axiom: str) -> None:
     with open("new-grammar.txt", "w", encoding="utf-8") as f:
         axiom_rule = language.rules[axiom]
@@ -1,113 +1,158 @@
-from src.build_parsing_table import is_terminal_symbol
-from src.grammar_utils import Grammar
-
-
-def check_grammar_reachability(language: Grammar, start_symbol: str) -> str | None:
-    reachable_symbols = set()
-    processing_queue = [start_symbol]
-
+from dataclasses import dataclass
+
+from src.grammar_utils import Grammar, CompactGrammar
+
+LL1_CONFLICT_HEADER = "Grammar is not LL(1). Directing set conflicts:"
+
+
+@dataclass
+class GrammarDiagnostics:
+    reachable: set[str]
+    productive: set[str]
+    unreachable: list[str]
+    unproductive: list[str]
+    cyclic_unproductive: list[str]
+
+    def reachability_message(self) -> str | None:
+        if not self.unreachable:
+            return None
+        return "Grammar is not reachable from start symbol. Symbols" + ",".join(self.unreachable)
+
+    def productivity_message(self) -> str | None:
+        if self.cyclic_unproductive:
+            return "Grammar is not productive. This nonterminals create a cycle: " + ",".join(self.cyclic_unproductive)
+        return "Grammar is not productive." if self.unproductive else None
+
+
+def analyze_grammar(compact: CompactGrammar, start_symbol: str) -> GrammarDiagnostics:
+    names = compact.symbols.names
+    nonterminal_flags = compact.symbols.nonterminal_flags
+    pending_counts = []
+    production_heads = []
+    occurrences = {head: [] for head in compact.rules}
+    dependencies = {head: set() for head in compact.rules}
+    worklist = []
+
+    for head, rule_obj in compact.rules.items():
+        for body in rule_obj.productions:
+            prod_id = len(pending_counts)
+            pending = 0
+            blocked = False
+            for sym in body:
+                if sym in compact.rules:
+                    occurrences[sym].append(prod_id)
+                    dependencies[head].add(sym)
+                    pending += 1
+                elif nonterminal_flags[sym]:
+                    blocked = True
+            pending_counts.append(-1 if blocked else pending)
+            production_heads.append(head)
+            if not blocked and pending == 0:
+                worklist.append(head)
+
+    productive_ids = set()
+    while worklist:
+        head = worklist.pop()
+        if head in productive_ids:
+            continue
+        productive_ids.add(head)
+        for prod_id in occurrences[head]:
+            if pending_counts[prod_id] > 0:
+                pending_counts[prod_id] -= 1
+                if pending_counts[prod_id] == 0:
+                    worklist.append(production_heads[prod_id])
+
+    reachable_ids = set()
+    processing_queue = [compact.symbols.ids[start_symbol]] if start_symbol in compact.symbols.ids else []
     while processing_queue:
         current = processing_queue.pop()
-        if current in reachable_symbols:
+        if current in reachable_ids:
             continue
-        reachable_symbols.add(current)
+        reachable_ids.add(current)
+        processing_queue.extend(sym for sym in dependencies.get(current, ()) if sym not in reachable_ids)
 
-        if current in language.rules:
-            for prod in language.rules[current].productions:
-                for sym in prod.symbols:
-                    if sym in language.rules and sym not in reachable_symbols:
-                        processing_queue.append(sym)
+    unproductive_ids = [head for head in compact.rules if head not in productive_ids]
+    cyclic_unproductive = [names[head] for head in unproductive_ids if not dependencies[head] & productive_ids]
 
-    all_nt = set(language.rules.keys())
-    unreachable_nt = all_nt - reachable_symbols
+    return GrammarDiagnostics(reachable={names[sym] for sym in reachable_ids},
+                              productive={names[sym] for sym in productive_ids},
+                              unreachable=sorted(names[head] for head in compact.rules if head not in reachable_ids),
+                              unproductive=sorted(names[head] for head in unproductive_ids),
+                              cyclic_unproductive=sorted(cyclic_unproductive))
 
-    return None if len(unreachable_nt) == 0 else "Grammar is not reachable from start symbol. Symbols" + ",".join(
-        unreachable_nt)
 
+def check_grammar_reachability(language: CompactGrammar, start_symbol: str) -> str | None:
+    return analyze_grammar(language, start_symbol).reachability_message()
 
-def check_grammar_productivity(language: Grammar) -> str | None:
-    productive_nt = set()
-    changed = True
 
-    for nonterminal, rule_obj in language.rules.items():
-        for prod in rule_obj.productions:
-            if all(is_terminal_symbol(sym) or sym == "ε" for sym in prod.symbols):
-                productive_nt.add(nonterminal)
-                break
-
-    while changed:
-        changed = False
-        for nonterminal, rule_obj in language.rules.items():
-            if nonterminal in productive_nt:
-                continue
+def check_grammar_productivity(language: CompactGrammar) -> str | None:
+    start_symbol = language.symbols.names[next(iter(language.rules))] if language.rules else None
+    return analyze_grammar(language, start_symbol).productivity_message()
 
-            for prod in rule_obj.productions:
-                if all(is_terminal_symbol(sym) or sym == "ε" or sym in productive_nt for sym in prod.symbols):
-                    productive_nt.add(nonterminal)
-                    changed = True
-                    break
 
-    all_nt = set(language.rules.keys())
-    unproductive_nt = all_nt - productive_nt
+@dataclass
+class DirectingConflict:
+    nonterminal: str
+    first_symbols: list[str]
+    second_symbols: list[str]
+    common_symbols: list[str]
 
-    if unproductive_nt:
-        dependency_graph = {nt: set() for nt in all_nt}
+    def __str__(self) -> str:
+        return (f"{self.nonterminal}: '{' '.join(self.first_symbols)}' and '{' '.join(self.second_symbols)}' "
+                f"have common symbols {self.common_symbols}")
 
-        for nonterminal, rule_obj in language.rules.items():
-            for prod in rule_obj.productions:
-                for sym in prod.symbols:
-                    if sym in language.rules:
-                        dependency_graph[nonterminal].add(sym)
 
-        cyclic_unproductive = set()
-        for nt in unproductive_nt:
-            if all(dep in unproductive_nt for dep in dependency_graph[nt]):
-                cyclic_unproductive.add(nt)
+def build_directing_index(language: Grammar) -> dict[str, dict[str, list[int]]]:
+    directing_index = {}
 
-        if cyclic_unproductive:
-            return "Grammar is not productive. This nonterminals create a cycle: " + ",".join(
-                sorted(cyclic_unproductive))
+    for nonterminal, rule_obj in language.rules.items():
+        rule_index = {}
+        for i, prod in enumerate(rule_obj.productions):
+            for sym in prod.first_set:
+                alternatives = rule_index.setdefault(sym, [])
+                if not alternatives or alternatives[-1] != i:
+                    alternatives.append(i)
+        directing_index[nonterminal] = rule_index
 
-    return None if len(unproductive_nt) == 0 else "Grammar is not productive."
+    return directing_index
 
 
-def verify_ll1_compatibility(language: Grammar) -> str | None:
+def find_ll1_conflicts(language: Grammar, directing_index: dict[str, dict[str, list[int]]] | None = None) -> list[
+        DirectingConflict]:
+    if directing_index is None:
+        directing_index = build_directing_index(language)
+
     conflict_list = []
+    for nonterminal, rule_index in directing_index.items():
+        shared_symbols = {}
+        for sym, alternatives in rule_index.items():
+            if len(alternatives) < 2:
+                continue
+            for i, first_alt in enumerate(alternatives):
+                for second_alt in alternatives[i + 1:]:
+                    shared_symbols.setdefault((first_alt, second_alt), []).append(sym)
 
-    for nonterminal, rule_obj in language.rules.items():
-        if len(rule_obj.productions) <= 1:
-            continue
+        productions = language.rules[nonterminal].productions
+        for (first_alt, second_alt), common_symbols in sorted(shared_symbols.items()):
+            conflict_list.append(DirectingConflict(nonterminal, productions[first_alt].symbols,
+                                                   productions[second_alt].symbols, sorted(common_symbols)))
 
-        directing_sets_list = []
-        for i, prod in enumerate(rule_obj.productions):
-            directing_set = set(prod.first_set)
-            directing_sets_list.append((i, directing_set))
+    return conflict_list
 
-        for i in range(len(directing_sets_list)):
-            for j in range(i + 1, len(directing_sets_list)):
-                set1 = directing_sets_list[i][1]
-                set2 = directing_sets_list[j][1]
-                common_symbols = set1 & set2
 
-                if common_symbols:
-                    prod1_str = ' '.join(rule_obj.productions[directing_sets_list[i][0]].symbols)
-                    prod2_str = ' '.join(rule_obj.productions[directing_sets_list[j][0]].symbols)
-                    conflict_list.append(
-                        f"{nonterminal}: '{prod1_str}' and '{prod2_str}' have common symbols {sorted(common_symbols)}")
+def verify_ll1_compatibility(language: Grammar) -> str | None:
+    conflict_list = find_ll1_conflicts(language)
 
     if conflict_list:
-        return "Grammar is not LL(1). Directing set conflicts:\n" + "\n".join(conflict_list)
+        return LL1_CONFLICT_HEADER + "\n" + "\n".join(str(c) for c in conflict_list)
 
     return None
 
 
-def validate_language(language: Grammar, start_symbol: str) -> str | None:
-    reachability_issue = check_grammar_reachability(language, start_symbol)
-    if reachability_issue:
-        return reachability_issue
+def is_ll1_conflict(message: str | None) -> bool:
+    return message is not None and message.startswith(LL1_CONFLICT_HEADER)
 
-    productivity_issue = check_grammar_productivity(language)
-    if productivity_issue:
-        return productivity_issue
 
-    return None
\ No newline at end of file
+def validate_language(language: CompactGrammar, start_symbol: str) -> str | None:
+    diagnostics = analyze_grammar(language, start_symbol)
+    return diagnostics.reachability_message() or diagnostics.productivity_message()
@@ -0,0 +1,283 @@
+from dataclasses import dataclass
+
+from src.build_parsing_table import create_analysis_table, create_rule_rows, calculate_rule_positions, order_rules, \
+    rule_row_count
+from src.grammar import compute_nullable, compute_first_masks, compute_follow_masks, sequence_first_mask, \
+    mask_to_symbols
+from src.grammar_utils import Rule, Production, CompactGrammar, CompactRule, EPSILON_ID
+from src.table import Line
+from src.util import is_nonterminal
+
+
+@dataclass
+class EditResult:
+    changed_productions: list[tuple[str, int]]
+    patched_rows: list[int]
+    moved_rules: dict[str, tuple[int, int]]
+    rebuilt: bool
+
+
+class IncrementalGrammar:
+    def __init__(self, language: CompactGrammar, start_symbol: str) -> None:
+        # Edits mutate the rules, so both forms get their own copies; the symbol table stays shared.
+        self.compact = CompactGrammar(language.symbols, {head: CompactRule(head, list(rule_obj.productions))
+                                                         for head, rule_obj in language.rules.items()})
+        self.language = self.compact.to_grammar()
+        self.start_symbol = start_symbol
+        self.start_id = self.compact.symbols.ids[start_symbol]
+        self.users = {}
+        for head, rule_obj in self.compact.rules.items():
+            for body in rule_obj.productions:
+                self.count_users(head, body, 1)
+
+        self.nullable = compute_nullable(self.compact)
+        self.first_masks = compute_first_masks(self.compact, self.nullable)
+        self.follow_masks = compute_follow_masks(self.compact, self.start_id, self.nullable, self.first_masks)
+        for head in self.compact.rules:
+            self.refresh_directing_sets(head)
+
+        self.table = []
+        self.rule_starts = {}
+        self.block_sizes = {}
+        self.block_alternatives = {}
+        self.symbol_rows = {}
+        self.end_row = None
+        self.rebuild_table()
+
+    def add_production(self, nonterminal: str, symbol_list: list[str]) -> EditResult:
+        return self.apply_edit(nonterminal, None, symbol_list)
+
+    def remove_production(self, nonterminal: str, index: int) -> EditResult:
+        return self.apply_edit(nonterminal, index, None)
+
+    def replace_production(self, nonterminal: str, index: int, symbol_list: list[str]) -> EditResult:
+        return self.apply_edit(nonterminal, index, symbol_list)
+
+    def count_users(self, head: int, body: tuple[int, ...], delta: int) -> None:
+        for sym in body:
+            head_counts = self.users.setdefault(sym, {})
+            head_counts[head] = head_counts.get(head, 0) + delta
+            if not head_counts[head]:
+                del head_counts[head]
+
+    def apply_edit(self, nonterminal: str, index: int | None, symbol_list: list[str] | None) -> EditResult:
+        symbols = self.compact.symbols
+        is_new_rule = nonterminal not in self.language.rules
+        if is_new_rule and index is not None:
+            raise ValueError(f"Unknown nonterminal '{nonterminal}'")
+        if symbol_list is not None:
+            for sym in symbol_list:
+                if is_nonterminal(sym) and sym not in self.language.rules and sym != nonterminal:
+                    raise ValueError(f"Unknown nonterminal '{sym}' in production of '{nonterminal}'")
+        if symbol_list is None and len(self.language.rules[nonterminal].productions) == 1:
+            raise ValueError(f"Cannot remove the only production of '{nonterminal}'")
+
+        head = symbols.intern(nonterminal)
+        if is_new_rule:
+            self.language.rules[nonterminal] = Rule(nonterminal, [])
+            self.compact.rules[head] = CompactRule(head, [])
+
+        rule_obj = self.language.rules[nonterminal]
+        compact_rule = self.compact.rules[head]
+        previous_productions = [(prod.symbols, set(prod.first_set)) for prod in rule_obj.productions]
+        previous_unions = {head: set().union(*(first_set for _, first_set in previous_productions))}
+        old_body = compact_rule.productions[index] if index is not None else ()
+        new_body = tuple(symbols.intern(sym) for sym in symbol_list) if symbol_list is not None else ()
+
+        self.count_users(head, old_body, -1)
+        self.count_users(head, new_body, 1)
+        if index is None:
+            rule_obj.productions.append(Production(list(symbol_list), []))
+            compact_rule.productions.append(new_body)
+        elif symbol_list is None:
+            del rule_obj.productions[index]
+            del compact_rule.productions[index]
+        else:
+            rule_obj.productions[index] = Production(list(symbol_list), [])
+            compact_rule.productions[index] = new_body
+
+        first_changed = self.update_first(head)
+        follow_changed = self.update_follow(head, old_body + new_body, first_changed, index == 0)
+
+        refreshed_heads = {head} | follow_changed
+        for sym in first_changed:
+            refreshed_heads.update(self.users.get(sym, ()))
+
+        changed_productions = []
+        for refreshed in refreshed_heads:
+            refreshed_rule = self.language.rules[symbols.names[refreshed]]
+            previous_unions.setdefault(refreshed, set().union(*(prod.first_set for prod in refreshed_rule.productions)))
+            if refreshed == head:
+                self.refresh_directing_sets(refreshed)
+                continue
+            for i, prod_changed in enumerate(self.refresh_directing_sets(refreshed)):
+                if prod_changed:
+                    changed_productions.append((refreshed_rule.nonterminal, i))
+
+        for i, prod in enumerate(rule_obj.productions):
+            if i >= len(previous_productions) or previous_productions[i] != (prod.symbols, set(prod.first_set)):
+                changed_productions.append((nonterminal, i))
+        changed_productions.sort()
+
+        changed_unions = {symbols.names[refreshed] for refreshed, previous in previous_unions.items()
+                          if previous != set().union(*(prod.first_set for prod in
+                                                       self.language.rules[symbols.names[refreshed]].productions))}
+        changed_rules = {nt for nt, _ in changed_productions} | {nonterminal}
+        return self.patch_table(nonterminal, is_new_rule, changed_rules, changed_unions, changed_productions)
+
+    def update_first(self, head: int) -> set[int]:
+        cone = {head}
+        stack = [head]
+        while stack:
+            current = stack.pop()
+            for user in self.users.get(current, ()):
+                if user not in cone:
+                    cone.add(user)
+                    stack.append(user)
+
+        previous = {sym: (self.nullable[sym], self.first_masks[sym]) for sym in cone if sym < len(self.nullable)}
+        compute_nullable(self.compact, cone, self.nullable)
+        compute_first_masks(self.compact, self.nullable, cone, self.first_masks)
+        return {sym for sym in cone if previous.get(sym) != (self.nullable[sym], self.first_masks[sym])}
+
+    def update_follow(self, head: int, edited_symbols: tuple[int, ...], first_changed: set[int],
+                      start_edited: bool) -> set[int]:
+        rules = self.compact.rules
+        seeds = {sym for sym in edited_symbols if sym in rules}
+        for sym in first_changed:
+            for user in self.users.get(sym, ()):
+                for body in rules[user].productions:
+                    if sym in body:
+                        seeds.update(other for other in body if other in rules)
+        if start_edited and head == self.start_id:
+            seeds.add(self.start_id)
+
+        cone = set(seeds)
+        stack = list(seeds)
+        while stack:
+            current = stack.pop()
+            for body in rules[current].productions:
+                for sym in reversed(body):
+                    if sym == EPSILON_ID:
+                        continue
+                    if sym not in rules:
+                        break
+                    if sym not in cone:
+                        cone.add(sym)
+                        stack.append(sym)
+                    if not self.nullable[sym]:
+                        break
+
+        scanned_heads = set()
+        for sym in cone:
+            scanned_heads.update(self.users.get(sym, ()))
+
+        previous = {sym: self.follow_masks[sym] if sym < len(self.follow_masks) else 0 for sym in cone}
+        compute_follow_masks(self.compact, self.start_id, self.nullable, self.first_masks, cone, self.follow_masks,
+                             scanned_heads)
+        return {sym for sym in cone if previous[sym] != self.follow_masks[sym]}
+
+    def refresh_directing_sets(self, head: int) -> list[bool]:
+        symbols = self.compact.symbols
+        rule_obj = self.language.rules[symbols.names[head]]
+        changed_flags = []
+        for prod_item, body in zip(rule_obj.productions, self.compact.rules[head].productions):
+            directing_mask, derives_epsilon = sequence_first_mask(body, self.nullable, self.first_masks)
+            if derives_epsilon:
+                directing_mask |= self.follow_masks[head]
+            directing_set = mask_to_symbols(directing_mask, symbols)
+            changed_flags.append(set(directing_set) != set(prod_item.first_set))
+            prod_item.first_set = directing_set
+        return changed_flags
+
+    def rebuild_table(self) -> None:
+        self.table = create_analysis_table(self.language, self.start_symbol)
+        self.rule_starts = calculate_rule_positions(self.language, self.start_symbol)
+        self.block_sizes = {}
+        self.block_alternatives = {}
+        self.symbol_rows = {}
+        for rule_obj in order_rules(self.language, self.start_symbol):
+            self.record_block(rule_obj)
+            self.index_symbol_rows(rule_obj.nonterminal, 1)
+        self.end_row = next((row.number for row in self.table if row.end), None)
+
+    def record_block(self, rule_obj: Rule) -> None:
+        self.block_alternatives[rule_obj.nonterminal] = len(rule_obj.productions)
+        self.block_sizes[rule_obj.nonterminal] = rule_row_count(rule_obj)
+
+    def index_symbol_rows(self, nonterminal: str, delta: int) -> None:
+        block_start = self.rule_starts[nonterminal]
+        alternatives_count = self.block_alternatives[nonterminal]
+        for row in self.table[block_start + alternatives_count:block_start + self.block_sizes[nonterminal]]:
+            if row.symbol in self.language.rules:
+                if delta > 0:
+                    self.symbol_rows.setdefault(row.symbol, set()).add(row.number)
+                else:
+                    self.symbol_rows[row.symbol].discard(row.number)
+
+    def patch_table(self, nonterminal: str, is_new_rule: bool, changed_rules: set[str], changed_unions: set[str],
+                    changed_productions: list[tuple[str, int]]) -> EditResult:
+        rule_obj = self.language.rules[nonterminal]
+        new_size = rule_row_count(rule_obj)
+        patched_rows = set()
+        moved_rules = {}
+
+        if not is_new_rule and new_size != self.block_sizes[nonterminal]:
+            if nonterminal == self.start_symbol or self.end_row in self.block_range(nonterminal):
+                self.rebuild_table()
+                return EditResult(changed_productions, [row.number for row in self.table], {}, True)
+
+            old_start = self.rule_starts[nonterminal]
+            self.index_symbol_rows(nonterminal, -1)
+            self.rule_starts[nonterminal] = len(self.table)
+            moved_rules[nonterminal] = (old_start, len(self.table))
+            for row_number in self.symbol_rows.get(nonterminal, ()):
+                self.table[row_number].pointer = len(self.table)
+                patched_rows.add(row_number)
+            is_new_rule = True
+
+        if is_new_rule:
+            self.rule_starts[nonterminal] = len(self.table)
+            rule_rows, _ = create_rule_rows(rule_obj, len(self.table), self.language, self.rule_starts,
+                                            self.end_row is not None)
+            self.table.extend(rule_rows)
+            self.record_block(rule_obj)
+            self.index_symbol_rows(nonterminal, 1)
+            patched_rows.update(row.number for row in rule_rows)
+            changed_rules = changed_rules - {nonterminal}
+
+        for changed_nt in changed_rules:
+            block_start = self.rule_starts[changed_nt]
+            end_marker_set = self.end_row is not None and self.end_row < block_start
+            rule_rows, _ = create_rule_rows(self.language.rules[changed_nt], block_start, self.language,
+                                            self.rule_starts, end_marker_set)
+            if any(row.end != self.table[row.number].end for row in rule_rows):
+                self.rebuild_table()
+                return EditResult(changed_productions, [row.number for row in self.table], {}, True)
+            self.index_symbol_rows(changed_nt, -1)
+            for row in rule_rows:
+                if not rows_equal(row, self.table[row.number]):
+                    self.table[row.number] = row
+                    patched_rows.add(row.number)
+            self.record_block(self.language.rules[changed_nt])
+            self.index_symbol_rows(changed_nt, 1)
+
+        for changed_nt in changed_unions:
+            union_set = list(set().union(*(prod.first_set for prod in self.language.rules[changed_nt].productions)))
+            for row_number in self.symbol_rows.get(changed_nt, ()):
+                if set(self.table[row_number].first_set) != set(union_set):
+                    self.table[row_number].first_set = union_set
+                    patched_rows.add(row_number)
+
+        return EditResult(changed_productions, sorted(patched_rows), moved_rules, False)
+
+    def block_range(self, nonterminal: str) -> range:
+        block_start = self.rule_starts[nonterminal]
+        return range(block_start, block_start + self.block_sizes[nonterminal])
+
+
+def rows_equal(first_row: Line, second_row: Line) -> bool:
+    return (first_row.number, first_row.symbol, sorted(first_row.first_set), first_row.shift, first_row.error,
+            first_row.pointer, first_row.stack, first_row.end) == (
+        second_row.number, second_row.symbol, sorted(second_row.first_set), second_row.shift, second_row.error,
+        second_row.pointer, second_row.stack, second_row.end)
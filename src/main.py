@@ -1,65 +1,131 @@
 import re
 import sys
+from functools import partial
 
 from lab6.main import task
 from src.build_parsing_table import create_analysis_table
 from src.check_line import validate_input_sequence
 from src.grammar import simplify_grammar, eliminate_direct_recursion, eliminate_indirect_recursion, remove_unused_rules, \
     compute_directing_sets
-from src.grammar_utils import parse_grammar_from_text, parse_grammar_with_first_sets, save_grammar
-from src.grammar_validation import validate_language, verify_ll1_compatibility
+from src.grammar_utils import CompactRule, parse_grammar_from_text, parse_grammar_with_first_sets, save_grammar, \
+    compact_grammar
+from src.grammar_validation import validate_language, verify_ll1_compatibility, is_ll1_conflict
+from src.packrat import PackratParser
+from src.profiling import PipelineProfiler, PROFILE_PATH
+from src.recognizer import load_recognizer
 from src.table import write_table, read_table
 
 
-def process_task1() -> None:
-    with open("new-grammar.txt", "r", encoding="utf-8") as f:
-        language = parse_grammar_with_first_sets(f.readlines())
-
-    table = create_analysis_table(language, list(language.rules.keys())[0])
-    write_table(table)
-
-
-def process_task2(input_string: str) -> str:
-    table_data = read_table()
-    return validate_input_sequence(input_string.split(), table_data)
-
-
-def process_task3() -> str | None:
-    with open("grammar.txt", "r", encoding="utf-8") as f:
-        language, start_nt = parse_grammar_from_text(f.readlines())
-
-    validation_result = validate_language(language, start_nt)
+def process_task1(profiler: PipelineProfiler | None = None) -> None:
+    profiler = profiler or PipelineProfiler(enabled=False)
+    with profiler.stage("read_new_grammar") as metrics:
+        with open("new-grammar.txt", "r", encoding="utf-8") as f:
+            language = parse_grammar_with_first_sets(f.readlines())
+    profiler.add_grammar_metrics(metrics, language)
+
+    with profiler.stage("build_table") as metrics:
+        table = create_analysis_table(language, list(language.rules.keys())[0])
+        metrics["rows"] = len(table)
+
+    with profiler.stage("write_table") as metrics:
+        write_table(table)
+        metrics["rows"] = len(table)
+
+
+def process_task2(input_string: str, profiler: PipelineProfiler | None = None) -> str:
+    profiler = profiler or PipelineProfiler(enabled=False)
+    with profiler.stage("read_table") as metrics:
+        table_data = read_table()
+        metrics["rows"] = len(table_data)
+
+    with profiler.stage("load_recognizer") as metrics:
+        try:
+            recognizer = load_recognizer(table_data)
+        except (SyntaxError, ImportError, OSError):
+            # The table interpreter accepts the same language when the generated module cannot be built.
+            recognizer = partial(validate_input_sequence, analysis_table=table_data)
+        metrics["rows"] = len(table_data)
+
+    with profiler.stage("validate_input") as metrics:
+        input_sequence = input_string.split()
+        metrics["tokens"] = len(input_sequence)
+        return recognizer(input_sequence)
+
+
+def process_fallback(input_string: str, profiler: PipelineProfiler | None = None) -> str:
+    profiler = profiler or PipelineProfiler(enabled=False)
+    with profiler.stage("read_new_grammar") as metrics:
+        with open("new-grammar.txt", "r", encoding="utf-8") as f:
+            language = compact_grammar(parse_grammar_with_first_sets(f.readlines()))
+    profiler.add_grammar_metrics(metrics, language)
+
+    with profiler.stage("packrat_parse") as metrics:
+        input_sequence = input_string.split()
+        metrics["tokens"] = len(input_sequence)
+        start_symbol = language.symbols.names[next(iter(language.rules))]
+        return PackratParser(language, start_symbol).parse(input_sequence)
+
+
+def process_task3(profiler: PipelineProfiler | None = None) -> str | None:
+    profiler = profiler or PipelineProfiler(enabled=False)
+    with profiler.stage("read_grammar") as metrics:
+        with open("grammar.txt", "r", encoding="utf-8") as f:
+            text_language, start_nt = parse_grammar_from_text(f.readlines())
+            # Every pass up to compute_directing_sets shares this one interned symbol table.
+            language = compact_grammar(text_language)
+    profiler.add_grammar_metrics(metrics, language)
+
+    with profiler.stage("validate_grammar") as metrics:
+        validation_result = validate_language(language, start_nt)
+    profiler.add_grammar_metrics(metrics, language)
 
     if validation_result:
         return validation_result
 
-    language = simplify_grammar(language)
+    with profiler.stage("simplify_grammar") as metrics:
+        language = simplify_grammar(language)
+    profiler.add_grammar_metrics(metrics, language)
 
-    language = eliminate_indirect_recursion(language)
+    with profiler.stage("eliminate_indirect_recursion") as metrics:
+        language = eliminate_indirect_recursion(language)
+    profiler.add_grammar_metrics(metrics, language)
 
-    language = eliminate_direct_recursion(language)
+    with profiler.stage("eliminate_direct_recursion") as metrics:
+        language = eliminate_direct_recursion(language)
+    profiler.add_grammar_metrics(metrics, language)
 
-    language = remove_unused_rules(language, start_nt)
+    with profiler.stage("remove_unused_rules") as metrics:
+        language = remove_unused_rules(language, start_nt)
+    profiler.add_grammar_metrics(metrics, language)
 
-    start_rule = language.rules[start_nt]
+    symbols = language.symbols
+    start_id = symbols.ids[start_nt]
+    start_rule = language.rules[start_id]
 
     requires_new_axiom = False
     if len(start_rule.productions) > 1:
         requires_new_axiom = True
-    elif start_rule.productions and (start_rule.nonterminal in start_rule.productions[0].symbols or (
-            start_rule.productions[0].symbols and start_rule.productions[0].symbols[-1].startswith('<') and
-            start_rule.productions[0].symbols[-1].endswith('>'))):
+    elif start_rule.productions and (start_id in start_rule.productions[0] or (
+            start_rule.productions[0] and symbols.nonterminal_flags[start_rule.productions[0][-1]])):
         requires_new_axiom = True
 
     if requires_new_axiom:
-        language.add_production("<axiom>", [start_nt, "#"], [])
+        axiom_id = symbols.intern("<axiom>")
+        axiom_rule = language.rules.setdefault(axiom_id, CompactRule(axiom_id, []))
+        axiom_rule.productions.append((start_id, symbols.intern("#")))
         start_nt = "<axiom>"
 
-    language = compute_directing_sets(language, start_nt)
+    with profiler.stage("compute_directing_sets") as metrics:
+        language = compute_directing_sets(language, start_nt)
+    profiler.add_grammar_metrics(metrics, language)
 
-    save_grammar(language, start_nt)
+    with profiler.stage("save_grammar") as metrics:
+        save_grammar(language, start_nt)
+    profiler.add_grammar_metrics(metrics, language)
 
-    ll1_issue = verify_ll1_compatibility(language)
+    with profiler.stage("verify_ll1") as metrics:
+        ll1_issue = verify_ll1_compatibility(language)
+    profiler.add_grammar_metrics(metrics, language)
     if ll1_issue:
         return ll1_issue
 
@@ -67,24 +133,42 @@ def process_task3() -> str | None:
 
 
 def process_task4() -> None:
-    if len(sys.argv) != 2:
-        print(f'Usage: python {sys.argv[0]} <input-file>')
+    arguments = sys.argv[1:]
+    profile_path = None
+    for argument in list(arguments):
+        if argument == "--profile" or argument.startswith("--profile="):
+            profile_path = argument.partition("=")[2] or PROFILE_PATH
+            arguments.remove(argument)
+
+    if len(arguments) != 1:
+        print(f'Usage: python {sys.argv[0]} <input-file> [--profile[=<output-json>]]')
         return
 
-    input_file = sys.argv[1]
+    input_file = arguments[0]
+    profiler = PipelineProfiler(enabled=profile_path is not None)
 
-    token_list = task(input_file)
+    try:
+        with profiler.stage("lex_input") as metrics:
+            token_list = task(input_file)
+            metrics["tokens"] = len(token_list)
 
-    input_line = " ".join(token.type for token in token_list)
+        input_line = " ".join(token.type for token in token_list)
 
-    error_msg = process_task3()
+        error_msg = process_task3(profiler)
 
-    if error_msg:
-        print(error_msg)
-        return
+        if error_msg:
+            print(error_msg)
+            if not is_ll1_conflict(error_msg):
+                return
+            result = process_fallback(input_line, profiler)
+        else:
+            process_task1(profiler)
+            result = process_task2(input_line, profiler)
+    finally:
+        profiler.stop()
+        if profile_path is not None:
+            profiler.save(profile_path)
 
-    process_task1()
-    result = process_task2(input_line)
     if result != "Ok":
         pattern = r"Error at index (\d+): '([^']+)'.*"
         match = re.match(pattern, result)
@@ -99,7 +183,3 @@ def process_task4() -> None:
 
 if __name__ == "__main__":
     process_task4()
-
-
-
-
@@ -0,0 +1,119 @@
+from collections import deque
+
+from src.grammar_utils import CompactGrammar, EPSILON_ID
+
+MEMO_FAIL = -1
+MEMO_UNKNOWN = -2
+INCOMPLETE_MESSAGE = "Error: Incomplete processing (No EOL)"
+
+
+class PackratParser:
+    __slots__ = ("symbols", "start_id", "alternatives", "window")
+
+    def __init__(self, compact: CompactGrammar, start_symbol: str, window: int | None = None) -> None:
+        self.symbols = compact.symbols
+        self.start_id = self.symbols.ids[start_symbol]
+        self.window = window
+        self.alternatives: list[tuple[tuple[int, ...], ...]] = [()] * len(self.symbols)
+        for head, rule_obj in compact.rules.items():
+            bodies = [tuple(sym for sym in body if sym != EPSILON_ID) for body in rule_obj.productions]
+            self.alternatives[head] = tuple(sorted(bodies, key=lambda body: not body))
+
+    def parse(self, input_sequence: list[str]) -> str:
+        symbol_ids = self.symbols.ids
+        tokens = [symbol_ids.get(token, MEMO_FAIL) for token in input_sequence]
+        end_position, farthest, expected = self.match(tokens)
+
+        if end_position == len(tokens):
+            return "Ok"
+        if farthest >= len(tokens):
+            return INCOMPLETE_MESSAGE
+        return f"Error at index {farthest}: '{input_sequence[farthest]}' not in {sorted(expected)}"
+
+    def match(self, tokens: list[int]) -> tuple[int, int, set[str]]:
+        alternatives = self.alternatives
+        nonterminal_flags = self.symbols.nonterminal_flags
+        names = self.symbols.names
+        stride = len(self.symbols)
+        token_count = len(tokens)
+        window = self.window
+        memo = {}
+        # The frame stack itself stays O(nesting depth); only the memo is bounded by the window.
+        # Calls still on the frame stack fail when re-entered at the same position, as a left recursion guard.
+        active = {self.start_id}
+        # With a window, memo keys are bucketed by start position; buckets[0] holds the keys starting at base.
+        buckets = deque()
+        base = 0
+        farthest = 0
+        expected = set()
+
+        frames = [[self.start_id, 0, 0, 0, 0]]
+        child_result = None
+
+        while frames:
+            frame = frames[-1]
+            nonterminal, start, alt, index, position = frame
+            bodies = alternatives[nonterminal]
+            if child_result is not None:
+                if child_result == MEMO_FAIL:
+                    alt, index, position = alt + 1, 0, start
+                else:
+                    position, index = child_result, index + 1
+                child_result = None
+
+            called = False
+            while alt < len(bodies):
+                body = bodies[alt]
+                failed = False
+                while index < len(body):
+                    sym = body[index]
+                    if nonterminal_flags[sym]:
+                        key = position * stride + sym
+                        cached = memo.get(key, MEMO_UNKNOWN)
+                        if cached == MEMO_UNKNOWN and key in active:
+                            cached = MEMO_FAIL
+                        if cached == MEMO_UNKNOWN:
+                            active.add(key)
+                            frame[2], frame[3], frame[4] = alt, index, position
+                            frames.append([sym, position, 0, 0, position])
+                            called = True
+                            break
+                        if cached == MEMO_FAIL:
+                            failed = True
+                            break
+                        position, index = cached, index + 1
+                    elif position < token_count and tokens[position] == sym:
+                        position, index = position + 1, index + 1
+                    else:
+                        if position > farthest:
+                            farthest, expected = position, {names[sym]}
+                        elif position == farthest:
+                            expected.add(names[sym])
+                        failed = True
+                        break
+                if called or not failed:
+                    break
+                alt, index, position = alt + 1, 0, start
+            if called:
+                continue
+
+            frames.pop()
+            child_result = position if alt < len(bodies) else MEMO_FAIL
+            key = start * stride + nonterminal
+            active.discard(key)
+            if window is None:
+                memo[key] = child_result
+            elif start >= base:
+                # Starts already behind the window are not memoised, so a backtrack past it recomputes them.
+                if not buckets:
+                    base = start
+                while len(buckets) <= start - base:
+                    buckets.append([])
+                buckets[start - base].append(key)
+                memo[key] = child_result
+                while buckets and base < position - window:
+                    for stale in buckets.popleft():
+                        memo.pop(stale, None)
+                    base += 1
+
+        return child_result, farthest, expected
@@ -0,0 +1,192 @@
+from array import array
+from collections.abc import Iterator
+
+from src.table import Line
+from src.util import is_nonterminal
+
+NO_NODE = -1
+NODE_NONE = 0
+NODE_CALL = 1
+NODE_TOKEN = 2
+NODE_EMPTY = 3
+
+
+class ParseTree:
+    __slots__ = ("symbol_names", "symbol_ids", "symbols", "parents", "first_children", "next_siblings",
+                 "token_indices")
+
+    def __init__(self) -> None:
+        self.symbol_names: list[str] = []
+        self.symbol_ids: dict[str, int] = {}
+        self.symbols = array("i")
+        self.parents = array("i")
+        self.first_children = array("i")
+        self.next_siblings = array("i")
+        self.token_indices = array("i")
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def intern(self, symbol_name: str) -> int:
+        symbol_id = self.symbol_ids.get(symbol_name)
+        if symbol_id is None:
+            symbol_id = self.symbol_ids[symbol_name] = len(self.symbol_names)
+            self.symbol_names.append(symbol_name)
+        return symbol_id
+
+    def link_children(self) -> None:
+        node_count = len(self.symbols)
+        first_children = array("i", [NO_NODE]) * node_count
+        next_siblings = array("i", [NO_NODE]) * node_count
+        last_children = array("i", [NO_NODE]) * node_count
+        for node, parent in enumerate(self.parents):
+            if parent == NO_NODE:
+                continue
+            previous = last_children[parent]
+            if previous == NO_NODE:
+                first_children[parent] = node
+            else:
+                next_siblings[previous] = node
+            last_children[parent] = node
+        self.first_children = first_children
+        self.next_siblings = next_siblings
+
+    def symbol(self, node: int) -> str:
+        return self.symbol_names[self.symbols[node]]
+
+    def children(self, node: int) -> Iterator[int]:
+        child = self.first_children[node]
+        while child != NO_NODE:
+            yield child
+            child = self.next_siblings[child]
+
+    def walk(self, node: int = 0) -> Iterator[tuple[int, int]]:
+        if not len(self):
+            return
+        depth = 0
+        current = node
+        while True:
+            yield current, depth
+            if self.first_children[current] != NO_NODE:
+                current = self.first_children[current]
+                depth += 1
+                continue
+            while current != node and self.next_siblings[current] == NO_NODE:
+                current = self.parents[current]
+                depth -= 1
+            if current == node:
+                return
+            current = self.next_siblings[current]
+
+    def leaves(self) -> Iterator[int]:
+        return (node for node, _ in self.walk() if self.token_indices[node] != NO_NODE)
+
+    def to_sexpr(self, tokens: list[str] | None = None) -> str:
+        parts = []
+        depth_stack = []
+        for node, depth in self.walk():
+            while depth_stack and depth_stack[-1] >= depth:
+                depth_stack.pop()
+                parts.append(")")
+            if self.first_children[node] == NO_NODE:
+                token_index = self.token_indices[node]
+                label = self.symbol(node)
+                if tokens is not None and token_index != NO_NODE:
+                    label = f"{label}:{tokens[token_index]}"
+                parts.append(f" {label}" if parts else label)
+            else:
+                parts.append(f" ({self.symbol(node)}" if parts else f"({self.symbol(node)}")
+                depth_stack.append(depth)
+        parts.extend(")" * len(depth_stack))
+        return "".join(parts)
+
+    def to_dict(self) -> dict:
+        return {"symbols": self.symbol_names, "symbol": self.symbols.tolist(), "parent": self.parents.tolist(),
+                "first_child": self.first_children.tolist(), "next_sibling": self.next_siblings.tolist(),
+                "token": self.token_indices.tolist()}
+
+
+def classify_rows(table_lookup: dict[int, Line], tree: ParseTree) -> dict[int, tuple[int, int]]:
+    row_actions = {}
+    for number, entry in table_lookup.items():
+        target = table_lookup.get(entry.pointer) if entry.pointer else None
+        if is_nonterminal(entry.symbol) and target is not None and target.symbol == entry.symbol:
+            action = NODE_CALL
+        elif entry.shift or entry.end:
+            action = NODE_TOKEN
+        elif entry.symbol == "ε":
+            action = NODE_EMPTY
+        else:
+            action = NODE_NONE
+        row_actions[number] = (action, tree.intern(entry.symbol))
+    return row_actions
+
+
+def parse_input_sequence(input_sequence: list[str], analysis_table: list[Line]) -> tuple[str, ParseTree]:
+    result, tree = build_parse_tree(input_sequence, analysis_table)
+    tree.link_children()
+    return result, tree
+
+
+def build_parse_tree(input_sequence: list[str], analysis_table: list[Line]) -> tuple[str, ParseTree]:
+    input_index = 0
+    table_position = 0
+    stack_list = []
+    node_stack = []
+    table_lookup = {entry.number: entry for entry in analysis_table}
+    tree = ParseTree()
+    row_actions = classify_rows(table_lookup, tree)
+    append_symbol = tree.symbols.append
+    append_parent = tree.parents.append
+    append_token = tree.token_indices.append
+    node_count = 0
+
+    current_node = NO_NODE
+    if table_position in table_lookup:
+        append_symbol(row_actions[table_position][1])
+        append_parent(NO_NODE)
+        append_token(NO_NODE)
+        current_node = 0
+        node_count = 1
+
+    while input_index < len(input_sequence):
+        if table_position not in table_lookup:
+            return f"Error: Invalid position {table_position}", tree
+
+        current_entry = table_lookup[table_position]
+        current_symbol = input_sequence[input_index]
+
+        if current_symbol not in current_entry.first_set:
+            if current_entry.error:
+                return f"Error at index {input_index}: '{current_symbol}' not in {current_entry.first_set}", tree
+            else:
+                table_position += 1
+                continue
+
+        action, symbol_id = row_actions[table_position]
+        parent_node = current_node
+        if action:
+            append_symbol(symbol_id)
+            append_parent(parent_node)
+            append_token(input_index if action == NODE_TOKEN else NO_NODE)
+            if action == NODE_CALL:
+                current_node = node_count
+            node_count += 1
+
+        if current_entry.end:
+            return ("Ok" if input_index == len(input_sequence) - 1 else "Error: Unexpected EOL"), tree
+
+        if current_entry.shift:
+            input_index += 1
+        if current_entry.stack:
+            stack_list.append(table_position + 1)
+            node_stack.append(parent_node)
+        if current_entry.pointer:
+            table_position = current_entry.pointer
+        elif stack_list:
+            table_position = stack_list.pop()
+            current_node = node_stack.pop()
+        else:
+            return f"Error at index {input_index}: No valid pointer", tree
+
+    return "Error: Incomplete processing (No EOL)", tree
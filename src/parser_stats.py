@@ -0,0 +1,67 @@
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+
+from src.build_parsing_table import create_analysis_table, order_rules, calculate_rule_positions, \
+    production_row_count
+from src.check_line import validate_input_sequence
+from src.grammar_utils import Grammar, is_repetition_rule
+
+
+@dataclass
+class ParserStatistics:
+    inputs: int = 0
+    row_hits: Counter = field(default_factory=Counter)
+    alternative_counts: dict[str, dict[str, int]] = field(default_factory=dict)
+
+
+def record_corpus(corpus: list[list[str]], language: Grammar, start_symbol: str,
+                  statistics: ParserStatistics | None = None) -> ParserStatistics:
+    statistics = statistics or ParserStatistics()
+    analysis_table = create_analysis_table(language, start_symbol)
+    corpus_hits = Counter()
+    for input_sequence in corpus:
+        validate_input_sequence(input_sequence, analysis_table, corpus_hits)
+        statistics.inputs += 1
+
+    statistics.row_hits.update(corpus_hits)
+    for nt, rule_counts in summarize_alternatives(language, start_symbol, corpus_hits).items():
+        merged = statistics.alternative_counts.setdefault(nt, {})
+        for body, count in rule_counts.items():
+            merged[body] = merged.get(body, 0) + count
+
+    return statistics
+
+
+def summarize_alternatives(language: Grammar, start_symbol: str, row_hits: Counter) -> dict[str, dict[str, int]]:
+    rule_positions = calculate_rule_positions(language, start_symbol)
+    alternative_counts = {}
+
+    for rule_obj in order_rules(language, start_symbol):
+        alternative_row = rule_positions[rule_obj.nonterminal]
+        production_start = alternative_row + len(rule_obj.productions)
+        repeating = is_repetition_rule(rule_obj)
+        rule_counts = {}
+        for prod in rule_obj.productions:
+            row_count = production_row_count(prod, repeating)
+            rule_counts[" ".join(prod.symbols)] = row_hits.get(production_start if row_count else alternative_row, 0)
+            production_start += row_count
+            alternative_row += 1
+        alternative_counts[rule_obj.nonterminal] = rule_counts
+
+    return alternative_counts
+
+
+def save_statistics(statistics: ParserStatistics, path: str = "parser_stats.json") -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"inputs": statistics.inputs,
+                   "row_hits": {str(row): hits for row, hits in sorted(statistics.row_hits.items())},
+                   "alternatives": statistics.alternative_counts}, f, indent=2, ensure_ascii=False)
+
+
+def load_statistics(path: str = "parser_stats.json") -> ParserStatistics:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return ParserStatistics(inputs=data["inputs"],
+                            row_hits=Counter({int(row): hits for row, hits in data["row_hits"].items()}),
+                            alternative_counts=data["alternatives"])
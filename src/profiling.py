@@ -0,0 +1,86 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from src.grammar_utils import Grammar, CompactGrammar
+
+PROFILE_PATH = "profile.json"
+
+
+@dataclass
+class StageRecord:
+    name: str
+    wall_seconds: float
+    cpu_seconds: float
+    peak_bytes: int
+    allocated_bytes: int
+    metrics: dict[str, int] = field(default_factory=dict)
+
+
+class PipelineProfiler:
+    def __init__(self, enabled: bool = True, trace_memory: bool = True) -> None:
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.stages: list[StageRecord] = []
+        self.started_tracing = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[dict[str, int]]:
+        metrics = {}
+        if not self.enabled:
+            yield metrics
+            return
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        memory_before, _ = tracemalloc.get_traced_memory()
+        cpu_before = time.process_time()
+        wall_before = time.perf_counter()
+        try:
+            yield metrics
+        finally:
+            wall_seconds = time.perf_counter() - wall_before
+            cpu_seconds = time.process_time() - cpu_before
+            memory_after, memory_peak = tracemalloc.get_traced_memory()
+            self.stages.append(StageRecord(name, wall_seconds, cpu_seconds, memory_peak - memory_before,
+                                           memory_after - memory_before, metrics))
+
+    def add_grammar_metrics(self, metrics: dict[str, int], language: Grammar | CompactGrammar) -> None:
+        # Called after the stage has exited, so the grammar walk is neither timed nor paid for when disabled.
+        if self.enabled:
+            metrics.update(grammar_metrics(language))
+
+    def stop(self) -> None:
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def to_dict(self) -> dict:
+        return {
+            "stages": [{"name": record.name, "wall_seconds": record.wall_seconds, "cpu_seconds": record.cpu_seconds,
+                        "peak_bytes": record.peak_bytes, "allocated_bytes": record.allocated_bytes,
+                        **record.metrics} for record in self.stages],
+            "total_wall_seconds": sum(record.wall_seconds for record in self.stages),
+            "total_cpu_seconds": sum(record.cpu_seconds for record in self.stages),
+            "max_peak_bytes": max((record.peak_bytes for record in self.stages), default=0),
+        }
+
+    def save(self, path: str = PROFILE_PATH) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def grammar_metrics(language: Grammar | CompactGrammar) -> dict[str, int]:
+    if isinstance(language, CompactGrammar):
+        bodies = [body for rule_obj in language.rules.values() for body in rule_obj.productions]
+    else:
+        bodies = [prod.symbols for rule_obj in language.rules.values() for prod in rule_obj.productions]
+    return {"rules": len(language.rules),
+            "productions": len(bodies),
+            "symbols": sum(len(body) for body in bodies)}
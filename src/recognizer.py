@@ -0,0 +1,211 @@
+import hashlib
+import importlib.util
+import os
+from typing import Callable
+
+from src.table import Line
+
+INCOMPLETE_MESSAGE = "Error: Incomplete processing (No EOL)"
+RECOGNIZER_CACHE_DIR = ".ll1_cache"
+# Rows inlined deeper than this start their own block function; CPython rejects about 100 nested blocks.
+MAX_INLINE_INDENT = 50
+
+
+class RecognizerWriter:
+    def __init__(self, analysis_table: list[Line]) -> None:
+        self.table_lookup = {entry.number: entry for entry in analysis_table}
+        self.lines: list[str] = []
+        self.constants: dict[tuple, str] = {}
+        self.constant_lines: list[str] = []
+        self.entry_points: list[int] = []
+        self.registered: set[int] = set()
+        self.in_degree = self.count_references(analysis_table)
+
+    @staticmethod
+    def count_references(analysis_table: list[Line]) -> dict[int, int]:
+        in_degree = {0: 2}
+        for entry in analysis_table:
+            if entry.pointer:
+                in_degree[entry.pointer] = in_degree.get(entry.pointer, 0) + 1
+            if entry.stack:
+                in_degree[entry.number + 1] = in_degree.get(entry.number + 1, 0) + 2
+            if not entry.error:
+                in_degree[entry.number + 1] = in_degree.get(entry.number + 1, 0) + 1
+        return in_degree
+
+    def constant(self, kind: str, value) -> str:
+        key = (kind, value)
+        if key not in self.constants:
+            name = f"{kind.upper()}_{len(self.constants)}"
+            self.constants[key] = name
+            if kind == "first":
+                self.constant_lines.append(f"{name} = frozenset({sorted(value)!r})")
+            else:
+                self.constant_lines.append(f"{name} = {value!r}")
+        return self.constants[key]
+
+    def register(self, position: int) -> None:
+        if position not in self.registered:
+            self.registered.add(position)
+            self.entry_points.append(position)
+
+    def emit(self, indent: int, text: str) -> None:
+        self.lines.append("    " * indent + text)
+
+    def jump(self, position: int, indent: int) -> None:
+        self.register(position)
+        self.emit(indent, f"return {position}, index")
+
+    def write_row(self, position: int, indent: int, path: set[int], known: frozenset[str] | None = None) -> None:
+        while True:
+            if position not in self.table_lookup:
+                self.emit(indent, f"return {f'Error: Invalid position {position}'!r}, index")
+                return
+
+            entry = self.table_lookup[position]
+            path.add(position)
+            first_collection = frozenset(entry.first_set)
+            always_true = known is not None and known <= first_collection
+            always_false = known is not None and not known & first_collection
+
+            if entry.error:
+                if always_false or not always_true:
+                    message = self.constant("listing", str(entry.first_set))
+                    error_return = f"return f\"Error at index {{index}}: '{{sym}}' not in \" + {message}, index"
+                    if always_false:
+                        self.emit(indent, error_return)
+                        return
+                    self.emit(indent, f"if not ({self.first_set_test(first_collection)}):")
+                    self.emit(indent + 1, error_return)
+                    known = first_collection if known is None else known & first_collection
+                next_position, known = self.write_success(entry, indent, known)
+            elif always_true:
+                next_position, known = self.write_success(entry, indent, known)
+            else:
+                if not always_false:
+                    self.emit(indent, f"if {self.first_set_test(first_collection)}:")
+                    branch_known = first_collection if known is None else known & first_collection
+                    success_target, branch_known = self.write_success(entry, indent + 1, branch_known)
+                    if success_target is not None:
+                        self.follow(success_target, indent + 1, set(path), branch_known)
+                    if known is not None:
+                        known = known - first_collection
+                next_position = position + 1
+
+            if next_position is None:
+                return
+            if self.must_jump(next_position, path):
+                self.jump(next_position, indent)
+                return
+            position = next_position
+
+    def first_set_test(self, first_collection: frozenset[str]) -> str:
+        if not first_collection:
+            return "False"
+        if len(first_collection) == 1:
+            return f"sym == {next(iter(first_collection))!r}"
+        return f"sym in {self.constant('first', first_collection)}"
+
+    def write_success(self, entry: Line, indent: int,
+                      known: frozenset[str] | None) -> tuple[int | None, frozenset[str] | None]:
+        if entry.end:
+            self.emit(indent, "return (\"Ok\" if index == n - 1 else \"Error: Unexpected EOL\"), index")
+            return None, known
+
+        if entry.shift:
+            self.emit(indent, "index += 1")
+            self.emit(indent, "if index >= n:")
+            self.emit(indent + 1, f"return {INCOMPLETE_MESSAGE!r}, index")
+            self.emit(indent, "sym = seq[index]")
+            known = None
+        if entry.stack:
+            self.register(entry.number + 1)
+            self.emit(indent, f"stack.append({entry.number + 1})")
+
+        if entry.pointer:
+            return entry.pointer, known
+        self.emit(indent, "if stack:")
+        self.emit(indent + 1, "return stack.pop(), index")
+        self.emit(indent, "return f\"Error at index {index}: No valid pointer\", index")
+        return None, known
+
+    def must_jump(self, position: int, path: set[int]) -> bool:
+        return position in path or position in self.registered or self.in_degree.get(position, 0) > 1
+
+    def follow(self, position: int, indent: int, path: set[int], known: frozenset[str] | None) -> None:
+        if indent > MAX_INLINE_INDENT or self.must_jump(position, path):
+            self.jump(position, indent)
+        else:
+            self.write_row(position, indent, path, known)
+
+    def write_module(self) -> str:
+        self.register(0)
+        index = 0
+        while index < len(self.entry_points):
+            position = self.entry_points[index]
+            self.emit(0, "")
+            self.emit(0, "")
+            self.emit(0, f"def block_{position}(seq, index, stack, n):")
+            self.emit(1, "sym = seq[index]")
+            self.write_row(position, 1, set())
+            index += 1
+
+        blocks = ", ".join(f"{position}: block_{position}" for position in sorted(self.entry_points))
+        return "\n".join([
+            "# Generated by src.recognizer from an LL(1) analysis table. Do not edit.",
+            "",
+            *self.constant_lines,
+            *self.lines,
+            "",
+            "",
+            f"BLOCKS = {{{blocks}}}",
+            "",
+            "",
+            "def validate(input_sequence):",
+            "    n = len(input_sequence)",
+            "    if not n:",
+            f"        return {INCOMPLETE_MESSAGE!r}",
+            "    stack = []",
+            "    position, index = 0, 0",
+            "    blocks = BLOCKS",
+            "    while True:",
+            "        block = blocks.get(position)",
+            "        if block is None:",
+            "            return f\"Error: Invalid position {position}\"",
+            "        position, index = block(input_sequence, index, stack, n)",
+            "        if position.__class__ is str:",
+            "            return position",
+            "",
+        ])
+
+
+def generate_recognizer_source(analysis_table: list[Line]) -> str:
+    return RecognizerWriter(analysis_table).write_module()
+
+
+def table_fingerprint(analysis_table: list[Line]) -> str:
+    digest = hashlib.sha256()
+    for entry in analysis_table:
+        digest.update(repr((entry.number, entry.symbol, entry.first_set, entry.shift, entry.error, entry.pointer,
+                            entry.stack, entry.end)).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def load_recognizer(analysis_table: list[Line], cache_dir: str = RECOGNIZER_CACHE_DIR) -> Callable[[list[str]], str]:
+    module_name = f"ll1_recognizer_{table_fingerprint(analysis_table)}"
+    module_path = os.path.join(cache_dir, module_name + ".py")
+
+    if not os.path.exists(module_path):
+        source = generate_recognizer_source(analysis_table)
+        # A module that does not compile must not be cached under the table fingerprint.
+        compile(source, module_path, "exec")
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = f"{module_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(source)
+        os.replace(temp_path, module_path)
+
+    spec = importlib.util.spec_from_file_location(module_name, module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.validate
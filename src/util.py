@@ -1,2 +1,6 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4096)
 def is_nonterminal(symbol_name: str) -> bool:
-    return symbol_name.startswith('<') and symbol_name.endswith('>') and len(symbol_name) > 2
\ No newline at end of file
+    return symbol_name.startswith('<') and symbol_name.endswith('>') and len(symbol_name) > 2
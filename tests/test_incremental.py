@@ -0,0 +1,84 @@
+import os
+
+from src.build_parsing_table import create_analysis_table, calculate_rule_positions, order_rules, rule_row_count
+from src.grammar import compute_directing_sets
+from src.grammar_utils import parse_grammar_from_text, compact_grammar
+from src.incremental import IncrementalGrammar
+
+GRAMMAR_PATH = os.path.join(os.path.dirname(__file__), "..", "grammar.txt")
+
+EDITS = [
+    ("add", "<stmt>", None, ["WRITE", "<expr>", "SEMICOLON"]),
+    ("add", "<print_list>", None, ["<expr>"]),
+    ("add", "<print_list>", None, ["<expr>", "COMMA", "<print_list>"]),
+    ("replace", "<io>", 0, ["PRINT", "<print_list>"]),
+    ("remove", "<factor>", 5, None),
+    ("replace", "<out>", 0, ["READ", "<full_id>"]),
+    ("add", "<decl_list>", None, ["ε"]),
+    ("replace", "<cond>", 1, ["NOT", "<cond>"]),
+    ("remove", "<stmt>", 5, None),
+    ("add", "<rel_op>", None, ["ε"]),
+    ("remove", "<decl_list>", 2, None),
+    ("add", "<program>", None, ["<block>", "DOT"]),
+]
+
+
+def read_productions() -> dict[str, list[list[str]]]:
+    with open(GRAMMAR_PATH, encoding="utf-8") as file:
+        language, _ = parse_grammar_from_text(file.readlines())
+    return {nt: [list(prod.symbols) for prod in rule_obj.productions] for nt, rule_obj in language.rules.items()}
+
+
+def rebuild(productions: dict[str, list[list[str]]]):
+    lines = [f"{nt} -> {' '.join(symbol_list)}\n" for nt, bodies in productions.items() for symbol_list in bodies]
+    language, start_symbol = parse_grammar_from_text(lines)
+    language = compute_directing_sets(compact_grammar(language), start_symbol)
+    return language, create_analysis_table(language, start_symbol), calculate_rule_positions(language, start_symbol)
+
+
+def directing_sets(language) -> dict[str, list[tuple[list[str], set[str]]]]:
+    return {nt: [(prod.symbols, set(prod.first_set)) for prod in rule_obj.productions]
+            for nt, rule_obj in language.rules.items()}
+
+
+def normalized_blocks(analysis_table, language, rule_starts, start_symbol) -> dict[str, list[tuple]]:
+    # Patched blocks may move to the end of the table, so rows and pointers are compared as (rule, offset).
+    owners = {}
+    for rule_obj in order_rules(language, start_symbol):
+        block_start = rule_starts[rule_obj.nonterminal]
+        for offset in range(rule_row_count(rule_obj)):
+            owners[block_start + offset] = (rule_obj.nonterminal, offset)
+
+    blocks = {}
+    for rule_obj in order_rules(language, start_symbol):
+        block_start = rule_starts[rule_obj.nonterminal]
+        blocks[rule_obj.nonterminal] = [
+            (row.symbol, sorted(row.first_set), row.shift, row.error,
+             None if row.pointer is None else owners[row.pointer], row.stack, row.end)
+            for row in analysis_table[block_start:block_start + rule_row_count(rule_obj)]]
+    return blocks
+
+
+def test_edits_match_full_rebuild():
+    productions = read_productions()
+    language, _, _ = rebuild(productions)
+    start_symbol = next(iter(productions))
+    incremental = IncrementalGrammar(compact_grammar(language), start_symbol)
+
+    for kind, nonterminal, index, symbol_list in EDITS:
+        bodies = productions.setdefault(nonterminal, [])
+        if kind == "add":
+            incremental.add_production(nonterminal, symbol_list)
+            bodies.append(symbol_list)
+        elif kind == "remove":
+            incremental.remove_production(nonterminal, index)
+            del bodies[index]
+        else:
+            incremental.replace_production(nonterminal, index, symbol_list)
+            bodies[index] = symbol_list
+
+        language, analysis_table, rule_starts = rebuild(productions)
+        assert directing_sets(incremental.language) == directing_sets(language), (kind, nonterminal, index)
+        assert normalized_blocks(incremental.table, incremental.language, incremental.rule_starts,
+                                 start_symbol) == normalized_blocks(analysis_table, language, rule_starts,
+                                                                    start_symbol), (kind, nonterminal, index)
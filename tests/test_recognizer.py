@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+from src import recognizer
+from src.build_parsing_table import create_analysis_table
+from src.check_line import validate_input_sequence
+from src.grammar import compute_directing_sets
+from src.grammar_utils import parse_grammar_from_text, compact_grammar
+
+
+def chain_table(length: int) -> list:
+    lines = ["<s> -> <a0> #"]
+    for i in range(length):
+        lines += [f"<a{i}> -> x{i} <a{i + 1}>", f"<a{i}> -> z{i}"]
+    lines.append(f"<a{length}> -> end")
+    language, start_symbol = parse_grammar_from_text([line + "\n" for line in lines])
+    return create_analysis_table(compute_directing_sets(compact_grammar(language), start_symbol), start_symbol)
+
+
+def test_long_chain_of_single_use_rules_compiles(tmp_path):
+    analysis_table = chain_table(120)
+    validate = recognizer.load_recognizer(analysis_table, str(tmp_path))
+    inputs = [[f"x{i}" for i in range(120)] + ["end", "#"], ["x0", "x1", "z2", "#"], ["x0", "z0", "#"], ["#"]]
+    for input_sequence in inputs:
+        assert validate(input_sequence) == validate_input_sequence(input_sequence, analysis_table)
+
+
+def test_module_that_fails_to_compile_is_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(recognizer, "generate_recognizer_source", lambda analysis_table: "def broken(:\n")
+    with pytest.raises(SyntaxError):
+        recognizer.load_recognizer(chain_table(2), str(tmp_path))
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,67 @@
+import itertools
+
+import pytest
+
+from slr_parser.glr import GLRParser
+from slr_parser.grammar import Grammar
+from slr_parser.slr_parser import SLRParser
+
+GRAMMARS = [
+    'E -> E + T | T\nT -> T * F | F\nF -> ( E ) | id',
+    'S -> S | C | ^\nA -> ^ | ^ | ^\nB -> ^ | S\nC -> C A a | B',
+    'S -> A | b\nA -> B | a A\nB -> C\nC -> c | ( S )',
+    'S -> C | S\nA -> B c | C | b a\nB -> c | B S\nC -> B',
+]
+
+
+@pytest.mark.parametrize('grammar_str', GRAMMARS)
+@pytest.mark.parametrize('mode, matrices, compressed, unit_elimination',
+                         list(itertools.product(('slr', 'lalr'), (False, True), (False, True), (False, True))))
+def test_table_layouts_match_dense_table(grammar_str, mode, matrices, compressed, unit_elimination):
+    if matrices:
+        pytest.importorskip('numpy')
+    G = Grammar(grammar_str)
+    dense = SLRParser(G, mode, unit_elimination=unit_elimination)
+    slr_parser = SLRParser(G, mode, matrices, compressed, unit_elimination)
+
+    for state, row in dense.parsing_table.items():
+        for symbol, entry in row.items():
+            if isinstance(entry, int):
+                assert slr_parser.goto_cell(state, symbol) == entry
+            elif '/' not in entry:
+                assert slr_parser.action_cell(state, symbol) == entry
+
+
+@pytest.mark.parametrize('compressed', (False, True))
+def test_unit_elimination_with_glr(compressed):
+    G = Grammar(GRAMMARS[1])
+    expected = GLRParser(SLRParser(G)).recognize('a c c a c b')
+    slr_parser = SLRParser(G, compressed=compressed, unit_elimination=True)
+    assert GLRParser(slr_parser).recognize('a c c a c b') == expected
+
+
+@pytest.mark.parametrize('tokens', ['id + id * id', '( id + id ) * id', 'id + * id', 'id ) id'])
+def test_matrix_parse_matches_dense_parse(tokens):
+    pytest.importorskip('numpy')
+    G = Grammar(GRAMMARS[0])
+    assert SLRParser(G, matrices=True).parse(tokens) == SLRParser(G).parse(tokens)
+
+
+@pytest.mark.parametrize('grammar_str', GRAMMARS)
+@pytest.mark.parametrize('unit_elimination', (False, True))
+def test_compressed_parse_matches_dense_parse(grammar_str, unit_elimination):
+    G = Grammar(grammar_str)
+    dense = SLRParser(G, unit_elimination=unit_elimination)
+    compressed = SLRParser(G, compressed=True, unit_elimination=unit_elimination)
+    for tokens in ('c a', 'c c', 'c', 'id + id * id', '( c )', 'a c c a c b'):
+        assert compressed.parse(tokens) == dense.parse(tokens)
+
+
+@pytest.mark.parametrize('unit_state_limit', (0, 1, 2))
+def test_unit_state_limit_caps_merged_states(unit_state_limit):
+    G = Grammar(GRAMMARS[0])
+    plain = SLRParser(G)
+    slr_parser = SLRParser(G, unit_elimination=True, unit_state_limit=unit_state_limit)
+    assert len(slr_parser.parsing_table) <= len(plain.parsing_table) + unit_state_limit
+    for tokens in ('id + id * id', '( id ) * ( id + id )', 'id + * id'):
+        assert (slr_parser.parse(tokens) == 'accept') == (plain.parse(tokens) == 'accept')
@@ -0,0 +1,31 @@
+import pytest
+
+from slr_parser.grammar import Grammar
+from slr_parser.slr_parser import SLRParser
+from slr_parser.trace import TraceSink
+
+
+class InterruptedSink(TraceSink):
+    def __init__(self, stop_at):
+        super().__init__()
+        self.stop_at = stop_at
+        self.closed = 0
+
+    def write(self, step, stack, symbols, buffer, pointer, action):
+        if step == self.stop_at:
+            raise KeyboardInterrupt
+
+    def close(self):
+        self.closed += 1
+
+
+@pytest.mark.parametrize('stop_at', (2, None))
+def test_trace_closes_sink_once(stop_at):
+    slr_parser = SLRParser(Grammar('E -> E + T | T\nT -> T * F | F\nF -> ( E ) | id'))
+    sink = InterruptedSink(stop_at)
+    if stop_at is None:
+        assert slr_parser.LR_trace('id + id', sink) == 'accept'
+    else:
+        with pytest.raises(KeyboardInterrupt):
+            slr_parser.LR_trace('id + id', sink)
+    assert sink.closed == 1